@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# vim expandtab shiftwidth=4 softtabstop=4
+"""
+NRB COMMERCIAL COSTING SHEET GENERATOR BENCHMARKS
+
+Time the alternative implementations against the real data configured in
+.env so the fastest option can be picked for production runs.
+
+    python benchmark.py readers -r 5
+    python benchmark.py sqlite -n 50000
+    python benchmark.py codecs -d K:/snapshots
+    python benchmark.py quantities -r 5
+"""
+from functools import partial
+from datetime import datetime
+from pathlib import Path
+from sqlite3 import connect, Cursor
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any, Callable, Iterable
+import click
+from modules.boms import find_excel_files_in_dir, load_bom, Boms
+from modules.catalog import (create_catalog_schema, load_from_database,
+                            phase_entries, read_resources, save_phase,
+                            save_to_database)
+from modules.consumables import Consumables
+from modules.databases import dbconnect
+from modules.hourlyrates import HourlyRates
+from modules.markups import MarkUps
+from modules.models import Models
+from modules.quantities import size_quantities, HAVE_NUMPY
+from modules.resources import (load_resource_file, Resource, Resources,
+                               ResourceSource)
+from modules.snapshot import load_snapshot, save_snapshot
+from modules.utilities import BOATS_FOLDER, DATABASE, RESOURCES_FOLDER
+from modules.workbooks import READERS
+
+
+def best_time(func: Callable[[], Any], repeat: int) -> tuple[float, Any]:
+    """fastest of repeat calls and the result of the last call"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = perf_counter()
+        result = func()
+        best = min(best, perf_counter() - start)
+    return best, result
+
+def time_readers(files: list[Path],
+                 load: Callable[[Path, str], Any],
+                 repeat: int) -> None:
+    """print load time of each file per reader and check results match"""
+    click.echo(f"{'file':32.32} " +
+               " ".join(f"{reader:>18}" for reader in READERS))
+    totals = dict.fromkeys(READERS, 0.0)
+    for xlsx_file in files:
+        times: dict[str, float] = {}
+        expected = None
+        for reader in READERS:
+            times[reader], result = best_time(
+                partial(load, xlsx_file, reader), repeat)
+            totals[reader] += times[reader]
+            if expected is None:
+                expected = result
+            elif result != expected:
+                click.echo(f"  {xlsx_file.name} {reader} result differs")
+        click.echo(f"{xlsx_file.name:32.32} " + " ".join(
+            f"{times[reader]:8.3f}s {times[READERS[0]] / times[reader]:7.2f}x"
+            for reader in READERS))
+    click.echo(f"{'TOTAL':32.32} " + " ".join(
+        f"{totals[reader]:8.3f}s {totals[READERS[0]] / totals[reader]:7.2f}x"
+        for reader in READERS))
+
+class RowCursor(Cursor):  # pylint: disable=too-few-public-methods
+    """cursor writing one row per statement, as storage did before"""
+    def executemany(self, sql: str,
+                    seq_of_parameters: Iterable) -> 'RowCursor':
+        """execute sql once for each parameters"""
+        for parameters in seq_of_parameters:
+            self.execute(sql, parameters)
+        return self
+
+def made_up_resources(count: int) -> Resources:
+    """count parts with one definition each"""
+    resources = Resources({})
+    for number in range(count):
+        part = f"P{number:08}"
+        resource = Resource(part, f"part {number}", "EA", number / 100,
+                            "OEM", f"V{number}", "VENDOR",
+                            datetime(2021, 1, 1), number / 200)
+        resources.resources[part] = resource
+        resources.sources[part] = [ResourceSource("BOM X.xlsx", number,
+                                                  resource)]
+    return resources
+
+def time_catalog(db_file: Path,
+                 resources: Resources,
+                 bulk: bool) -> tuple[float, float, dict[str, int]]:
+    """write then read back the resources of a catalog, bulk through
+    save_to_database and one json_each query, or a row per statement and
+    a query per part with default pragmas, returns write and read seconds
+    and the definitions read of each part"""
+    parts = list(resources.sources)
+    start = perf_counter()
+    if bulk:
+        save_to_database(db_file, Boms({}), Consumables({}), HourlyRates({}),
+                         MarkUps({}), Models({}), resources)
+        written = perf_counter() - start
+        conn = dbconnect(db_file)
+        found = {part: len(sources) for part, sources in read_resources(
+            conn.cursor(), parts).sources.items()}
+    else:
+        conn = connect(db_file)
+        rows = conn.cursor(RowCursor)
+        create_catalog_schema(rows)
+        save_phase(rows, 'resources', phase_entries(
+            'resources', Boms({}), Consumables({}), HourlyRates({}),
+            MarkUps({}), Models({}), resources))
+        conn.commit()
+        conn.close()
+        written = perf_counter() - start
+        conn = connect(db_file)
+        cursor = conn.cursor()
+        found = {}
+        for part in parts:
+            cursor.execute("SELECT * FROM resources WHERE oempart = ?",
+                           (part,))
+            found[part] = len(cursor.fetchall())
+    conn.close()
+    return written, perf_counter() - start - written, found
+
+def load_everything(snapshot_file: Path) -> None:
+    """open snapshot and build every BOM and resource in it"""
+    boms, _, _, _, _, resources = load_snapshot(snapshot_file)
+    for _ in boms.boms.values():
+        pass
+    for _ in resources.sources.values():
+        pass
+
+
+@click.group()
+def benchmark() -> None:
+    """benchmarks against the folders configured in .env"""
+
+@benchmark.command()
+@click.option('-r', '--repeat', default=3, show_default=True,
+              help="Best time of this many loads per file")
+@click.option('--boms', is_flag=True,
+              help="Also time the BOM sheets in BOATS_FOLDER")
+def readers(repeat: int, boms: bool) -> None:
+    """time openpyxl, streaming and native readers on resource sheets"""
+    resource_files = [sheet
+                      for sheet in find_excel_files_in_dir(RESOURCES_FOLDER)
+                      if sheet.name.startswith('BOM ')]
+    time_readers(resource_files, load_resource_file, repeat)
+    if boms:
+        click.echo()
+        time_readers(find_excel_files_in_dir(BOATS_FOLDER), load_bom, repeat)
+
+@benchmark.command()
+@click.option('-n', '--count', default=50000, show_default=True,
+              help="Number of parts to store")
+def sqlite(count: int) -> None:
+    """time catalog resources bulk against a row per statement"""
+    resources = made_up_resources(count)
+    results = {}
+    with TemporaryDirectory() as folder:
+        for bulk in (False, True):
+            written, read, found = time_catalog(
+                Path(folder) / f"{bulk}.db", resources, bulk)
+            results[bulk] = (written, read)
+            if found != dict.fromkeys(resources.sources, 1):
+                click.echo(f"  {'bulk' if bulk else 'per row'} read back "
+                           "differs")
+    click.echo(f"{count} parts    {'write':>18} {'read':>18}")
+    for bulk, label in ((False, 'per row'), (True, 'bulk')):
+        written, read = results[bulk]
+        click.echo(f"{label:13} "
+                   f"{written:8.3f}s {results[False][0] / written:7.2f}x "
+                   f"{read:8.3f}s {results[False][1] / read:7.2f}x")
+
+@benchmark.command()
+@click.option('-d', '--folder', type=click.Path(file_okay=False),
+              default=None,
+              help="Write snapshots here, such as the network share "
+              "[default: temporary folder]")
+@click.option('-r', '--repeat', default=3, show_default=True,
+              help="Best time of this many writes/loads per codec")
+def codecs(folder: str, repeat: int) -> None:
+    """size, write and load time of DATABASE as a snapshot per codec"""
+    catalog = load_from_database(DATABASE)
+    settings = [('none', 0), ('zlib', 1), ('zlib', 6), ('zlib', 9),
+                ('bz2', 1), ('bz2', 9), ('lzma', 0), ('lzma', 6),
+                ('lzma', 9)]
+    click.echo(f"{'codec':10} {'size':>12} {'write':>9} {'load':>9}")
+    with TemporaryDirectory(dir=folder) as target:
+        for codec, level in settings:
+            snapshot_file = Path(target) / f"{codec}{level}.snap"
+            written, _ = best_time(
+                partial(save_snapshot, snapshot_file, *catalog, codec,
+                        level), repeat)
+            loaded, _ = best_time(
+                partial(load_everything, snapshot_file), repeat)
+            click.echo(f"{codec:5} {level:4} "
+                       f"{snapshot_file.stat().st_size:12,} "
+                       f"{written:8.3f}s {loaded:8.3f}s")
+
+@benchmark.command()
+@click.option('-r', '--repeat', default=3, show_default=True,
+              help="Best time of this many passes over every BOM")
+def quantities(repeat: int) -> None:
+    """part quantities of every BOM in DATABASE for all its sizes at once,
+    plain Python against NumPy"""
+    boms = load_from_database(DATABASE)[0].boms
+
+    def all_boms(vectorized: bool) -> dict[str, Any]:
+        return {name: size_quantities(bom, list(bom.sizes), vectorized)
+                for name, bom in boms.items()}
+    engines = [(False, 'python')] + ([(True, 'numpy')] if HAVE_NUMPY else [])
+    results = {}
+    for vectorized, label in engines:
+        elapsed, results[vectorized] = best_time(
+            partial(all_boms, vectorized), repeat)
+        click.echo(f"{label:8} {elapsed:8.3f}s")
+    if HAVE_NUMPY and repr(results[True]) != repr(results[False]):
+        click.echo("  numpy quantities differ")
+
+if __name__ == "__main__":
+    benchmark()
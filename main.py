@@ -18,25 +18,35 @@ CRITICAL to log file, screen and email
 """
 import sys
 import traceback
+from multiprocessing import freeze_support
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
 import click
 from modules.boms import load_boms, Boms
 from modules import config
 from modules.consumables import load_consumables, Consumables
 from modules.costingsheets import generate_sheets_for_all_models
-from modules.databases import load_from_database, save_to_database
+from modules.catalogdiff import diff_report
+from modules.catalog import (compact_database, load_from_database,
+                            save_to_database, LazyBoms, PHASES)
+from modules.filecache import FileCache
 from modules.hourlyrates import load_hourly_rates, HourlyRates
 from modules.markups import MarkUp, load_mark_ups, MarkUps
 from modules.models import load_models, Models
 from modules.msrp_summary import generate_msrp_summary
-from modules.resources import load_resources, Resources
+from modules.ndjson import export_catalog, import_catalog
+from modules.resources import conflict_report, load_resources, Resources
 from modules.settings import Settings
+from modules.snapshot import load_snapshot, save_snapshot, CODECS
+from modules.staging import source_base, stage_workbooks
 from modules.utilities import (enable_logging, logger, options, status_msg,
                                BOATS_FOLDER, CONSUMABLES_FILE, DATABASE,
-                               HOURLY_RATES_FILE, MARK_UPS_FILE, MODELS_FILE,
+                               FILE_CACHE, HOURLY_RATES_FILE, MARK_UPS_FILE,
+                               MODELS_FILE,
                                MAIL_SERVER, MAIL_FROM, MAIL_TO,
-                               RESOURCES_FOLDER,)
+                               RESOURCES_FOLDER, SNAPSHOT, STAGING_FOLDER)
+from modules.workbooks import READERS
+from modules.workers import Pipeline
 
 #
 # ==================== Main Entry Point
@@ -50,20 +60,91 @@ from modules.utilities import (enable_logging, logger, options, status_msg,
 @click.option('-s', '--save', 'save_file', is_flag=False,
               flag_value="DATABASE",
               default="", help="Save data to sqlite database")
+@click.option('--compact', is_flag=True,
+              help="Reclaim space of replaced entries in the database")
+@click.option('--snapshot', 'snapshot_file', is_flag=False,
+              flag_value="SNAPSHOT",
+              default="", help="Load from this memory mapped snapshot "
+              "instead of the database, written whenever sheets are read")
+@click.option('--codec', type=click.Choice(list(CODECS)), default='none',
+              show_default=True,
+              help="Compress snapshot, only 'none' is memory mapped")
+@click.option('--level', type=click.IntRange(0, 9), default=None,
+              help="Compression level of --codec  [default: per codec]")
+@click.option('--export', 'export_file', type=click.Path(dir_okay=False),
+              default=None, help="Also write everything to this newline "
+              "delimited JSON file")
+@click.option('--import', 'import_file',
+              type=click.Path(exists=True, dir_okay=False),
+              default=None, help="Load from this newline delimited JSON "
+              "file instead of the database")
+@click.option('-c', '--cache', 'cache_file', is_flag=False,
+              flag_value="FILE_CACHE",
+              default="", help="Only re-read spreadsheets changed since "
+              "they were cached in this file")
+@click.option('--hash', 'hashing', is_flag=True,
+              help="Cache also compares file contents, not just size/time")
+@click.option('--stage', 'staging', is_flag=False,
+              flag_value="STAGING_FOLDER",
+              default="", help="Copy workbooks to this local folder first "
+              "and read the copies")
+@click.option('-m', '--model', 'only_models', multiple=True,
+              help="Only generate sheets for this model folder, "
+              "repeatable")
 @click.option('--hgac', 'hgac', is_flag=True,
               help="Sheet has commision/hgac totals")
 @click.option('--net', 'net', is_flag=True,
               help="Show Dealer Net Price")
 @click.option('--summary', is_flag=True,
               help="Generate MSRP Summary Report")
+@click.option('--conflicts', is_flag=True,
+              help="List parts priced differently in several RESOURCE rows")
+@click.option('--diff', 'diff_files', nargs=2,
+              type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Only list what changed from the first database to the "
+              "second")
+@click.option('--reader', 'reader', type=click.Choice(READERS),
+              default='openpyxl', show_default=True,
+              help="Spreadsheet reader, streaming/native never build Cells")
+@click.option('-j', '--jobs', 'jobs', type=click.IntRange(min=0), default=1,
+              show_default=True,
+              help="Worker processes loading RESOURCE/BOM sheets, 0 = per cpu")
+@click.option('--io-threads', 'io_threads', type=click.IntRange(min=0),
+              default=0, show_default=True,
+              help="Threads reading RESOURCE/BOM sheets ahead of the "
+              "parsers, 0 = read in the parsers")
+@click.option('--queue-depth', 'queue_depth', type=click.IntRange(min=1),
+              default=4, show_default=True,
+              help="Sheets read ahead of the parsers with --io-threads")
+@click.option('-r', '--rebuild', 'rebuild', multiple=True,
+              type=click.Choice(list(PHASES)),
+              help="Re-read phase from spreadsheets, other phases come from "
+              "the database which is then updated")
 @click.option('-v', '--verbose', count=True,
               help="Increase verbosity")
 def main(build_only: bool,
          load_file: Union[Path, str],
          save_file: Union[Path, str],
+         compact: bool,
+         snapshot_file: Union[Path, str],
+         codec: str,
+         level: Optional[int],
+         export_file: Optional[str],
+         import_file: Optional[str],
+         cache_file: Union[Path, str],
+         hashing: bool,
+         staging: Union[Path, str],
+         only_models: tuple[str, ...],
          hgac: bool,
          net: bool,
          summary: bool,
+         conflicts: bool,
+         diff_files: Optional[tuple[str, str]],
+         reader: str,
+         jobs: int,
+         io_threads: int,
+         queue_depth: int,
+         rebuild: tuple[str, ...],
          verbose: int) -> None:
     """ main program entry point """
     config.hgac = hgac
@@ -81,65 +162,170 @@ def main(build_only: bool,
     models: Models
     resources: Resources
     settings: Settings
+    if rebuild and not load_file:
+        load_file = "DATABASE"
+    if rebuild and not save_file:
+        save_file = load_file
     if load_file == "DATABASE":
         load_file = DATABASE
     if save_file == "DATABASE":
         save_file = DATABASE
+    if snapshot_file == "SNAPSHOT":
+        snapshot_file = SNAPSHOT
+    if cache_file == "FILE_CACHE":
+        cache_file = FILE_CACHE
+    cache = FileCache(cache_file, hashing) if cache_file else None
+    pipeline = Pipeline(io_threads, queue_depth) if io_threads else None
+    if staging == "STAGING_FOLDER":
+        staging = STAGING_FOLDER
+    resources_folder: Path = RESOURCES_FOLDER
+    boats_folder: Path = BOATS_FOLDER
+    workbooks: list[Path] = [MODELS_FILE, CONSUMABLES_FILE,
+                             HOURLY_RATES_FILE, MARK_UPS_FILE]
+    # read transaction of boms read from the database as they are used
+    lazy_boms: Optional[LazyBoms] = None
     try:
-        if load_file:
-            boms, consumables, hourly_rates, mark_ups, models, resources = load_from_database(load_file)
-        else:
-            # load information from spreadsheets
-            models = load_models(MODELS_FILE)
+        if diff_files:
+            for line in diff_report(*diff_files):
+                click.echo(line)
+            return
+        if import_file:
+            load_file = ""
+        # with -r only those phases are read from spreadsheets, boms only
+        # hold part numbers so new pricing needs no BOM sheets
+        phases = (set(rebuild) if load_file or import_file
+                  else set(PHASES))
+        if staging and phases:
+            # only workbooks of phases read from spreadsheets are staged
+            folders = {'resources': resources_folder, 'boms': boats_folder}
+            files = {'models': workbooks[:1], 'settings': workbooks[1:]}
+            staged = stage_workbooks(
+                [folder for phase, folder in folders.items()
+                 if phase in phases],
+                [workbook for phase, group in files.items()
+                 if phase in phases for workbook in group],
+                Path(staging),
+                source_base(list(folders.values()), workbooks))
+            resources_folder = staged.get(resources_folder, resources_folder)
+            boats_folder = staged.get(boats_folder, boats_folder)
+            workbooks = [staged.get(workbook, workbook)
+                         for workbook in workbooks]
+        models_file, consumables_file, hourly_rates_file, mark_ups_file = (
+            workbooks)
+        if import_file:
+            boms, consumables, hourly_rates, mark_ups, models, resources = (
+                import_catalog(import_file))
+        elif load_file and snapshot_file:
+            boms, consumables, hourly_rates, mark_ups, models, resources = (
+                load_snapshot(snapshot_file))
+        elif load_file:
+            boms, consumables, hourly_rates, mark_ups, models, resources = (
+                load_from_database(
+                    load_file, [phase for phase in PHASES
+                                if phase not in phases], lazy=True))
+            if isinstance(boms.boms, LazyBoms):
+                lazy_boms = boms.boms
+
+        # load information from spreadsheets
+        if 'models' in phases:
+            models = load_models(models_file, reader)
             status_msg(f"{len(models.models)} models loaded", 0)
 
-            # resources is only needed to build BomPart
-            resources = load_resources(RESOURCES_FOLDER)
+        if 'resources' in phases:
+            # resources are only needed when merging BomParts
+            resources = load_resources(resources_folder, reader, jobs, cache,
+                                       pipeline)
             status_msg(f"{len(resources.resources)} resources loaded", 0)
 
+        if 'boms' in phases:
             # build BOM information
-            boms = load_boms(BOATS_FOLDER, resources.resources)
+            boms = load_boms(boats_folder, reader, jobs, cache, pipeline)
             status_msg(f"{len(boms.boms)} boms loaded", 0)
 
+        if 'settings' in phases:
             # build Consumables information
-            consumables = load_consumables(CONSUMABLES_FILE)
+            consumables = load_consumables(consumables_file, reader)
             status_msg(f"{len(consumables.consumables)} consumables loaded", 0)
 
             # build Hourly Rates information
-            hourly_rates = load_hourly_rates(HOURLY_RATES_FILE)
+            hourly_rates = load_hourly_rates(hourly_rates_file, reader)
             status_msg(
                 f"{len(hourly_rates.hourly_rates)} hourly rates loaded", 0)
 
             # build BOM information
-            mark_ups = load_mark_ups(MARK_UPS_FILE)
+            mark_ups = load_mark_ups(mark_ups_file, reader)
             status_msg(f"{len(mark_ups.mark_ups)} mark ups loaded", 0)
 
+        if conflicts:
+            for line in conflict_report(resources):
+                click.echo(line)
+
         settings = Settings(consumables.consumables,
                             hourly_rates.hourly_rates,
                             mark_ups.mark_ups)
+        # boms loaded from the database are read as models need them
+        targets = models.models
+        if only_models:
+            targets = {folder: model for folder, model in targets.items()
+                       if folder in only_models}
+            for folder in set(only_models) - set(targets):
+                status_msg(f"model {folder} not found", 0)
         if (not build_only) and (not summary):
             generate_sheets_for_all_models(boms.boms,
-                                           models.models,
+                                           resources.resources,
+                                           targets,
                                            settings)
         if not build_only and summary:
             generate_msrp_summary(boms.boms,
-                                  models.models,
+                                  resources.resources,
+                                  targets,
                                   settings)
         if save_file:
-            save_to_database(save_file, 
+            # phases taken from the same catalog are already saved there
+            save_to_database(save_file,
                 boms,
                 consumables,
                 hourly_rates,
                 mark_ups,
                 models,
-                resources
+                resources,
+                phases if (load_file and not snapshot_file and
+                           Path(save_file) == Path(load_file))
+                else PHASES
             )
+        if snapshot_file and (phases or import_file):
+            save_snapshot(snapshot_file,
+                          boms,
+                          consumables,
+                          hourly_rates,
+                          mark_ups,
+                          models,
+                          resources,
+                          codec,
+                          level)
+        if export_file:
+            export_catalog(export_file,
+                           boms,
+                           consumables,
+                           hourly_rates,
+                           mark_ups,
+                           models,
+                           resources)
+        if lazy_boms is not None:
+            # compacting can only fold the log once no read is open
+            lazy_boms.close()
+            lazy_boms = None
+        if compact:
+            compact_database(save_file or load_file or DATABASE)
     except Exception:
         logger.critical(traceback.format_exc())
         raise
     finally:
+        if lazy_boms is not None:
+            lazy_boms.close()
         # program terminates normally
         sys.exit()
 
 if __name__ == "__main__":
+    freeze_support()
     main()  # pylint: disable=E1120
@@ -7,32 +7,28 @@ Pass in master_file return data structure
 """
 from dataclasses import dataclass, field
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 from typing import Optional, Union
 from dataclasses_json import DataClassJsonMixin
-from openpyxl import load_workbook # pylint: disable=import-error
-from openpyxl.worksheet.worksheet import Worksheet
-from openpyxl.workbook.workbook import Workbook
-from .resources import Resource
+from .filecache import FileCache
 from .utilities import status_msg
+from .workbooks import open_sheet
+from .workers import map_files, Pipeline
 
 @dataclass(order=True)
 class BomPart(DataClassJsonMixin):
-    """Part Information from Section of a BOM Parts Sheet"""
-    # pylint: disable=too-many-instance-attributes
+    """Part Information from Section of a BOM Parts Sheet
+
+    Only what the BOM sheet itself says is kept, pricing and descriptions
+    are looked up in the resources when merging so a change to RESOURCE
+    never requires the BOM sheets to be read again.
+    """
     part: str
     qty: float = field(compare=False)
     smallest: float = field(compare=False)
     biggest: float = field(compare=False)
     percent: float = field(compare=False)  # FT field
-    description: str = field(compare=False)
-    uom: str = field(compare=False)
-    unitprice: float = field(compare=False)
-    oem: str = field(compare=False)
-    vendorpart: str = field(compare=False)
-    vendor: str = field(compare=False)
-    updated: datetime = field(compare=False)
-    dealer_net: float = field(compare=False)
 
 @dataclass(order=True)
 class BomSection(DataClassJsonMixin):
@@ -43,12 +39,18 @@ class BomSection(DataClassJsonMixin):
 @dataclass(order=True)
 class Bom(DataClassJsonMixin):
     """BOM sheet"""
+    # pylint: disable=too-many-instance-attributes
     name: str
     beam: str = field(compare=False)
     smallest: float = field(compare=False)
     biggest: float = field(compare=False)
     sizes: dict[str, dict[str, float]] = field(compare=False)
     sections: dict[str, BomSection] = field(compare=False)
+    # per size, filled in by quantities.part_quantities(), never saved
+    quantities: dict[str, dict[str, dict[str, Optional[float]]]] = field(
+        default_factory=dict, init=False, repr=False, compare=False)
+    # hash of the fields above, filled in by costing_merge.bom_digest()
+    digest: str = field(default='', init=False, repr=False, compare=False)
 
 @dataclass(order=True)
 class Boms(DataClassJsonMixin):
@@ -80,6 +82,7 @@ class MergedSection(DataClassJsonMixin):
 @dataclass(order=True)
 class MergedBom(DataClassJsonMixin):
     """BOM sheet"""
+    # pylint: disable=too-many-instance-attributes
     name: str
     beam: str = field(compare=False)
     size: str = field(compare=False)
@@ -95,45 +98,26 @@ HOURTYPES = {
 }
 
 def find_excel_files_in_dir(base: Path) -> list[Path]:
-    """get list of spreadsheets in folder"""
-    return list(base.glob('[!~]*.xlsx'))
+    """get list of spreadsheets in folder sorted by name"""
+    return sorted(base.glob('[!~]*.xlsx'))
 
-def make_bom_part(row, resources: dict[str, Resource]) -> BomPart:
-    """Create bom part from row in spreadsheet"""
-    qty: float = float(row[0].value)
+def make_bom_part(row: tuple) -> BomPart:
+    """Create bom part from row values in spreadsheet"""
+    qty: float = float(row[0])
     smallest: float = (
         0.0
-        if row[1].value is None or row[1].value == ''
-        else float(row[1].value))
+        if row[1] is None or row[1] == ''
+        else float(row[1]))
     biggest: float = (
         0.0
-        if row[2].value is None or row[2].value == ''
-        else float(row[2].value))
+        if row[2] is None or row[2] == ''
+        else float(row[2]))
     percent: float = (
         0.0
-        if row[3].value is None or row[3].value == ''
-        else float(row[3].value))
-    part: str = str(row[5].value)
-
-    # fww resolve at later point, we need to throw errors on fail
-    if part in resources:
-        resource = resources[part]
-    else:
-        resource = Resource(part, "Unknown", "EA", 0.0, "Unknown", part,
-                            "Unknown", datetime(1999,12,31))
-    return BomPart(part,
-                   qty,
-                   smallest,
-                   biggest,
-                   percent,
-                   resource.description,
-                   resource.uom,
-                   resource.unitprice,
-                   resource.oem,
-                   resource.vendorpart,
-                   resource.vendor,
-                   resource.updated,
-                   resource.dealer_net)
+        if row[3] is None or row[3] == ''
+        else float(row[3]))
+    part: str = str(row[5])
+    return BomPart(part, qty, smallest, biggest, percent)
 
 def section_add_part(parts: dict[str, list[BomPart]], part: BomPart) -> None:
     """Insert new part or add qty to existing part"""
@@ -142,77 +126,103 @@ def section_add_part(parts: dict[str, list[BomPart]], part: BomPart) -> None:
     parts[part.part].append(part)
 
 
-def get_hull_sizes(sheet: Worksheet) -> dict[str, dict[str, float]]:
-    """find all hull sizes listed in sheet"""
+def get_hull_sizes(values: tuple) -> dict[str, dict[str, float]]:
+    """find all hull sizes listed in first row of sheet from M1 on"""
     sizes: dict[str, dict[str, float]] = {}
-    for values  in sheet.iter_rows(
-            min_row=1,max_row=1,min_col=13,values_only=True):
-        for value in values:
-            if value:
-                sizes[str(value)] = {}
+    for value in values[12:]:
+        if value:
+            sizes[str(value)] = {}
     return sizes
 
-def get_bom_sections(sheet: Worksheet,
-                     resources: dict[str, Resource]) -> dict[str, BomSection]:
-    """read in BOM items into sections"""
-    sections: dict[str, BomSection] = {}
-    for row in sheet.iter_rows(min_row=18,max_col=8):
-        qty: Optional[Union[str, int, float]] = row[0].value
-        # Add new section, skip for Canvas
-        if isinstance(qty, str) and qty != "QTY":
-            if qty == 'CANVAS':
-                continue
-            section: BomSection = BomSection(qty, {})
-            sections[qty] = section
-        elif isinstance(qty, (float, int)):
-            bom_part: BomPart = make_bom_part(row, resources)
-            status_msg(f"    {bom_part}",3)
-            section_add_part(section.parts, bom_part)
-    return sections
-
-def bom_hours(sheet: Worksheet,
-              sizes: dict[str, dict[str, float]]) -> None:
-    """read in labor  hours and update sizes array"""
+def bom_section_row(row: tuple,
+                    sections: dict[str, BomSection],
+                    section: Optional[BomSection]) -> Optional[BomSection]:
+    """add section or part found in row, returns section now being filled"""
+    qty: Optional[Union[str, int, float]] = row[0]
+    # Add new section, skip for Canvas
+    if isinstance(qty, str) and qty != "QTY":
+        if qty == 'CANVAS':
+            return section
+        section = BomSection(qty, {})
+        sections[qty] = section
+    elif isinstance(qty, (float, int)):
+        bom_part: BomPart = make_bom_part(row)
+        status_msg(f"    {bom_part}",3)
+        section_add_part(section.parts, bom_part)  # type: ignore
+    return section
+
+def bom_hours(row: tuple, sizes: dict[str, dict[str, float]]) -> None:
+    """add labor hours in row to sizes array if it is an hours row"""
     hours: Optional[Union[str, int, float]]
-    maximum = len(sizes) * 4 + 11
-    for row in sheet.iter_rows(min_row=14,max_col=maximum):
-        name: Optional[str] = row[6].value
-        if not (isinstance(name, str) and "Hours" in (name or '')):
-            continue
-        for index, size in enumerate(sizes):
-            hours = row[14 + index * 4].value
-            if not isinstance(hours, (int, float)):
-                hours = 0.0
-            sizes[size][ HOURTYPES[(name or '')] ] = hours
-            sizes[size]['Total'] = sizes[size].get('Total', 0.0) + hours
-
-def load_bom(xlsx_file: Path, resources: dict[str, Resource]) -> Bom:
-    """load individual BOM sheet"""
+    name: Optional[str] = row[6]
+    if not (isinstance(name, str) and "Hours" in (name or '')):
+        return
+    for index, size in enumerate(sizes):
+        hours = row[14 + index * 4]
+        if not isinstance(hours, (int, float)):
+            hours = 0.0
+        sizes[size][ HOURTYPES[(name or '')] ] = hours
+        sizes[size]['Total'] = sizes[size].get('Total', 0.0) + hours
+
+def load_bom(xlsx_file: Path,
+             reader: str = 'openpyxl',
+             content: Optional[bytes] = None) -> Bom:
+    """load individual BOM sheet, from content instead if it was read already
+
+    Row 1 holds the name (A1) and hull sizes (M1 on, or ANY), every later
+    row is read once and only as wide as the hours columns:
+        A2       -- beam
+        G13/G14  -- smallest/biggest hull size
+        14 on    -- labor hours rows, name in G and hours per size
+        18 on    -- section names and parts
+    """
+    # pylint: disable=too-many-locals
     status_msg(f'  {xlsx_file.name}', 2)
-    xlsx: Workbook = load_workbook(xlsx_file.as_posix(), data_only=True)
-    sheet: Worksheet = xlsx.active
-
-    name: str = str(sheet["A1"].value)
-    beam: str = "" if sheet["A2"].value is None else sheet["A2"].value
-    smallest: float = float(
-        0 if sheet["M1"].value == "ANY" else sheet["G13"].value)
-    biggest:float  = float(
-        0 if sheet["M1"].value == "ANY" else sheet["G14"].value)
-    sizes = {"0": {}} if smallest == 0 else get_hull_sizes(sheet)
-    sections: dict[str, BomSection] = get_bom_sections(sheet, resources)
-    bom_hours(sheet, sizes)
-    bom: Bom = Bom(name, beam, smallest, biggest, sizes, sections)
-    xlsx.close()
-    return bom
+    with open_sheet(xlsx_file, reader, content) as sheet:
+        header: tuple = next(
+            sheet.iter_rows(max_row=1, values_only=True), (None,))
+        any_size: bool = len(header) > 12 and header[12] == "ANY"
+        hull_sizes = get_hull_sizes(header)
+        name: str = str(header[0])
+        beam: str = ""
+        smallest: float = 0.0
+        biggest: float = 0.0
+        sizes = {"0": {}} if any_size else hull_sizes
+        sections: dict[str, BomSection] = {}
+        section: Optional[BomSection] = None
+        rows = sheet.iter_rows(min_row=2,
+                               max_col=max(len(hull_sizes) * 4 + 11, 15),
+                               values_only=True)
+        for number, row in enumerate(rows, start=2):
+            if number == 2:
+                beam = "" if row[0] is None else row[0]
+            elif number == 13 and not any_size:
+                smallest = float(row[6])
+                if smallest == 0:
+                    sizes = {"0": {}}
+            elif number == 14 and not any_size:
+                biggest = float(row[6])
+            if number >= 14:
+                bom_hours(row, sizes)
+            if number >= 18:
+                section = bom_section_row(row, sections, section)
+    return Bom(name, beam, smallest, biggest, sizes, sections)
 
 def load_boms(bom_folder: Path,
-              resources: dict[str, Resource]) -> Boms:
-    """load all BOM sheets"""
+              reader: str = 'openpyxl',
+              jobs: int = 1,
+              cache: Optional[FileCache] = None,
+              pipeline: Optional[Pipeline] = None) -> Boms:
+    """load all BOM sheets, in parallel if jobs is not 1. With a cache only
+    sheets changed since the last run are read, with a pipeline sheets are
+    read on threads while earlier ones are parsed"""
     status_msg('Loading BOMs', 1)
     bom_files: list[Path] = find_excel_files_in_dir(bom_folder)
     all_boms: Boms = Boms({})
-    for bom_file in bom_files:
-        bom = load_bom(bom_file, resources)
+    load = partial(load_bom, reader=reader)
+    for bom in (cache.map_files(load, bom_files, 'boms', jobs, pipeline)
+                if cache else map_files(load, bom_files, jobs,
+                                        pipeline=pipeline)):
         all_boms.boms[bom.name] = bom
     return all_boms
 
@@ -0,0 +1,637 @@
+#!/usr/bin/env python
+# vim expandtab shiftwidth=4 softtabstop=4
+"""
+Normalized sqlite catalog of everything read from the spreadsheets
+
+Tables:
+    resources    -- every definition of a part: sheet, row, used flag
+    boms         -- one row per BOM sheet
+    bom_sizes    -- hull sizes of each BOM
+    bom_hours    -- labor hours per BOM, size and hour type
+    bom_sections -- sections of each BOM
+    bom_parts    -- parts of each section
+    models       -- boat/cabin sheets combined into each costing sheet
+    settings     -- consumables, hourly rates and mark ups as name/field/value
+    entries      -- position and content hash of each entry of a phase
+    phases       -- when each phase was last read from its spreadsheets
+
+The tables are grouped in PHASES (resources, boms, models, settings). A
+phase can be saved again on its own, leaving the tables of the other
+phases alone, so refreshing one phase never needs the other spreadsheets.
+
+Entries are saved only when their hash changed, the entries table keeps
+where each goes so every dict comes back in the order the spreadsheets
+had. Rows within an entry are read back in the order they were written.
+Columns holding raw cell values have no declared type so numbers stay
+numbers and text stays text.
+
+The catalog is written in WAL mode inside one transaction per save, and
+every read of a run happens in one read transaction, BOMs read lazily
+included, so a run sees one save from start to finish and neither waits
+on nor blocks a run saving the next one.
+
+Other tools can query the catalog directly, for example every BOM that
+uses a part:
+
+    SELECT DISTINCT bom FROM bom_parts WHERE part = 'P00500'
+"""
+from collections import OrderedDict
+from collections.abc import Iterator, Mapping
+from dataclasses import asdict
+from datetime import datetime
+from json import dumps, loads
+from pathlib import Path
+from sqlite3 import Connection, Cursor
+from typing import Any, Callable, Collection, Optional, Union
+from .boms import Bom, BomPart, Boms, BomSection
+from .consumables import Consumable, Consumables
+from .databases import dbconnect, dbopen, file_message
+from .hourlyrates import HourlyRate, HourlyRates
+from .markups import MarkUp, MarkUps
+from .models import Model, Models
+from .resources import Resource, Resources, ResourceSource
+from .utilities import entry_hash, status_msg, NRBError
+
+# bump when the tables change shape, older catalogs must be saved again
+CATALOG_VERSION = 3
+SQLITE_HEADER = b'SQLite format 3\x00'
+# BOMs kept by LazyBoms, a model needs at most two at a time
+LAZY_BOMS = 32
+
+# each phase is read from its own spreadsheets and kept in its own tables
+PHASES: dict[str, tuple[str, ...]] = {
+    'resources': ('resources',),
+    'boms': ('boms', 'bom_sizes', 'bom_hours', 'bom_sections', 'bom_parts'),
+    'models': ('models',),
+    'settings': ('settings',),
+}
+TABLES = tuple(table for tables in PHASES.values() for table in tables)
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS resources (
+        id          integer primary key,
+        oempart     text not null,
+        description,
+        uom,
+        unitprice   real not null,
+        oem,
+        vendorpart,
+        vendor,
+        updated,
+        dealer_net  real not null,
+        file        text not null,
+        row         integer not null,
+        used        integer not null);
+    CREATE INDEX IF NOT EXISTS resources_oempart ON resources (oempart);
+
+    CREATE TABLE IF NOT EXISTS boms (
+        name        text primary key not null,
+        beam,
+        smallest    real not null,
+        biggest     real not null);
+
+    CREATE TABLE IF NOT EXISTS bom_sizes (
+        id          integer primary key,
+        bom         text not null,
+        size        text not null,
+        unique (bom, size));
+
+    CREATE TABLE IF NOT EXISTS bom_hours (
+        id          integer primary key,
+        bom         text not null,
+        size        text not null,
+        hours       text not null,
+        value       not null,
+        unique (bom, size, hours));
+
+    CREATE TABLE IF NOT EXISTS bom_sections (
+        id          integer primary key,
+        bom         text not null,
+        name        not null,
+        unique (bom, name));
+
+    CREATE TABLE IF NOT EXISTS bom_parts (
+        id          integer primary key,
+        bom         text not null,
+        section     not null,
+        part        text not null,
+        qty         real not null,
+        smallest    real not null,
+        biggest     real not null,
+        percent     real not null);
+    CREATE INDEX IF NOT EXISTS bom_parts_bom ON bom_parts (bom, section);
+    CREATE INDEX IF NOT EXISTS bom_parts_part ON bom_parts (part);
+
+    CREATE TABLE IF NOT EXISTS models (
+        folder      primary key not null,
+        sheet1,
+        sheet2);
+    CREATE INDEX IF NOT EXISTS models_sheet1 ON models (sheet1);
+    CREATE INDEX IF NOT EXISTS models_sheet2 ON models (sheet2);
+
+    CREATE TABLE IF NOT EXISTS settings (
+        id          integer primary key,
+        kind        text not null,
+        name        not null,
+        field       text not null,
+        value       real not null,
+        unique (kind, name, field));
+
+    CREATE TABLE IF NOT EXISTS entries (
+        phase       text not null,
+        name        not null,
+        position    integer not null,
+        hash        text not null,
+        primary key (phase, name));
+
+    CREATE TABLE IF NOT EXISTS phases (
+        phase       text primary key not null,
+        built       text not null);
+"""
+
+# rows that make up one entry of a phase, parameters from entry_key()
+DELETES: dict[str, tuple[str, ...]] = {
+    'resources': ("DELETE FROM resources WHERE oempart = ?",),
+    'boms': ("DELETE FROM boms WHERE name = ?",
+             "DELETE FROM bom_sizes WHERE bom = ?",
+             "DELETE FROM bom_hours WHERE bom = ?",
+             "DELETE FROM bom_sections WHERE bom = ?",
+             "DELETE FROM bom_parts WHERE bom = ?"),
+    'models': ("DELETE FROM models WHERE folder = ?",),
+    'settings': ("DELETE FROM settings WHERE kind = ? AND name = ?",),
+}
+SETTINGS: dict[str, type] = {
+    'consumables': Consumable,
+    'hourly_rates': HourlyRate,
+    'mark_ups': MarkUp,
+}
+
+
+class CatalogError(NRBError):
+    """Database is not a catalog this version can read"""
+
+
+def is_catalog_file(db_file: Union[Path, str]) -> bool:
+    """is db_file missing or an sqlite database, not an old pickle"""
+    path = Path(db_file)
+    if not path.exists() or path.stat().st_size == 0:
+        return True
+    with open(path, 'rb') as source:
+        return source.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+
+def create_catalog_schema(cursor: Cursor) -> None:
+    """create catalog tables and indexes if necessary, a statement at a
+    time as executescript would commit the open transaction"""
+    for statement in SCHEMA.split(';'):
+        if statement.strip():
+            cursor.execute(statement)
+
+def check_catalog_version(cursor: Cursor) -> None:
+    """refuse catalogs written by another version
+
+    Raises:
+        CatalogError
+    """
+    cursor.execute("PRAGMA user_version")
+    version = cursor.fetchone()[0]
+    if version != CATALOG_VERSION:
+        raise CatalogError(f"catalog version {version} is not "
+                           f"{CATALOG_VERSION}, save it again with -s")
+
+def json_list(values: list[str]) -> str:
+    """values as a json array for json_each(), any number of values binds
+    as a single parameter"""
+    return dumps(values)
+
+def date_value(value: Any) -> Any:
+    """updated cells hold dates, stored as iso text"""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+# WRITE =======================================================================
+def setting_key(kind: str, name: str) -> str:
+    """name of a settings entry, names are only unique within a kind"""
+    return dumps([kind, name])
+
+def entry_key(phase: str, name: Any) -> tuple:
+    """parameters of the DELETES of an entry"""
+    return tuple(loads(name)) if phase == 'settings' else (name,)
+
+def phase_entries(phase: str,
+                  boms: Boms,
+                  consumables: Consumables,
+                  hourly_rates: HourlyRates,
+                  mark_ups: MarkUps,
+                  models: Models,
+                  resources: Resources) -> dict[Any, Any]:
+    """entries of a phase by name in the order they are to be read back"""
+    if phase == 'resources':
+        return {part: [(source, source.resource is resources.resources.get(
+                            part)) for source in sources]
+                for part, sources in resources.sources.items()}
+    if phase == 'boms':
+        return dict(boms.boms)
+    if phase == 'models':
+        return dict(models.models)
+    return {setting_key(kind, name): value
+            for kind, values in (('consumables', consumables.consumables),
+                                 ('hourly_rates', hourly_rates.hourly_rates),
+                                 ('mark_ups', mark_ups.mark_ups))
+            for name, value in values.items()}
+
+def write_resources(cursor: Cursor,
+                    entries: dict[str, list[tuple[ResourceSource, bool]]]
+                    ) -> None:
+    """every definition of parts, flagging the one in use"""
+    cursor.executemany("""
+        INSERT INTO resources
+            (oempart, description, uom, unitprice, oem, vendorpart, vendor,
+             updated, dealer_net, file, row, used)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", [
+            (source.resource.oempart, source.resource.description,
+             source.resource.uom, source.resource.unitprice,
+             source.resource.oem, source.resource.vendorpart,
+             source.resource.vendor,
+             (source.resource.updated.isoformat()
+              if isinstance(source.resource.updated, datetime)
+              else source.resource.updated),
+             source.resource.dealer_net, source.file, source.row, used)
+            for sources in entries.values()
+            for source, used in sources])
+
+def write_boms(cursor: Cursor, boms: dict[str, Bom]) -> None:
+    """BOMs with their sizes, hours, sections and parts"""
+    cursor.executemany("""
+        INSERT INTO boms (name, beam, smallest, biggest)
+        VALUES (?, ?, ?, ?)""", [
+            (bom.name, bom.beam, bom.smallest, bom.biggest)
+            for bom in boms.values()])
+    cursor.executemany("""
+        INSERT INTO bom_sizes (bom, size) VALUES (?, ?)""", [
+            (bom.name, size)
+            for bom in boms.values()
+            for size in bom.sizes])
+    cursor.executemany("""
+        INSERT INTO bom_hours (bom, size, hours, value)
+        VALUES (?, ?, ?, ?)""", [
+            (bom.name, size, hours, value)
+            for bom in boms.values()
+            for size, labor in bom.sizes.items()
+            for hours, value in labor.items()])
+    cursor.executemany("""
+        INSERT INTO bom_sections (bom, name) VALUES (?, ?)""", [
+            (bom.name, section)
+            for bom in boms.values()
+            for section in bom.sections])
+    cursor.executemany("""
+        INSERT INTO bom_parts
+            (bom, section, part, qty, smallest, biggest, percent)
+        VALUES (?, ?, ?, ?, ?, ?, ?)""", [
+            (bom.name, section.name, part.part, part.qty, part.smallest,
+             part.biggest, part.percent)
+            for bom in boms.values()
+            for section in bom.sections.values()
+            for parts in section.parts.values()
+            for part in parts])
+
+def write_models(cursor: Cursor, models: dict[Any, Model]) -> None:
+    """sheets combined into each costing sheet"""
+    cursor.executemany("""
+        INSERT INTO models (folder, sheet1, sheet2) VALUES (?, ?, ?)""", [
+            (model.folder, model.sheet1, model.sheet2)
+            for model in models.values()])
+
+def write_settings(cursor: Cursor, settings: dict[str, Any]) -> None:
+    """consumable rates, hourly rates and mark ups, one row per field"""
+    cursor.executemany("""
+        INSERT INTO settings (kind, name, field, value)
+        VALUES (?, ?, ?, ?)""", [
+            (*entry_key('settings', key), field, value)
+            for key, setting in settings.items()
+            for field, value in asdict(setting).items()])
+
+WRITERS: dict[str, Callable[[Cursor, dict[Any, Any]], None]] = {
+    'resources': write_resources,
+    'boms': write_boms,
+    'models': write_models,
+    'settings': write_settings,
+}
+
+def save_phase(cursor: Cursor, phase: str, entries: dict[Any, Any]) -> int:
+    """write only the entries whose hash changed and drop removed ones
+
+    Arguments:
+        cursor: Cursor -- active database cursor
+        phase: str -- one of PHASES
+        entries: dict -- entries of phase by name, see phase_entries()
+
+    Returns:
+        int -- number of entries written or removed
+    """
+    cursor.execute("SELECT name, position, hash FROM entries "
+                   "WHERE phase = ?", (phase,))
+    stored = {name: (position, digest)
+              for name, position, digest in cursor.fetchall()}
+    current = {name: (position, entry_hash(entry))
+               for position, (name, entry) in enumerate(entries.items())}
+    changed = [name for name, (_, digest) in current.items()
+               if stored.get(name, (0, ''))[1] != digest]
+    removed = [name for name in stored if name not in current]
+    for delete in DELETES[phase]:
+        cursor.executemany(delete, [entry_key(phase, name)
+                                    for name in changed + removed])
+    WRITERS[phase](cursor, {name: entries[name] for name in changed})
+    cursor.executemany("DELETE FROM entries WHERE phase = ? AND name = ?",
+                       [(phase, name) for name in removed])
+    cursor.executemany("""
+        INSERT OR REPLACE INTO entries (phase, name, position, hash)
+        VALUES (?, ?, ?, ?)""", [
+            (phase, name, position, digest)
+            for name, (position, digest) in current.items()
+            if stored.get(name) != (position, digest)])
+    status_msg(f"  {phase} {len(changed)} changed, {len(removed)} removed",
+               1)
+    return len(changed) + len(removed)
+
+
+# READ ========================================================================
+def read_positions(cursor: Cursor, phase: str) -> dict[Any, int]:
+    """where each entry of phase goes, entries may be stored in any order"""
+    cursor.execute("SELECT name, position FROM entries WHERE phase = ?",
+                   (phase,))
+    return dict(cursor.fetchall())
+
+def read_resources(cursor: Cursor,
+                   parts: Optional[list[str]] = None) -> Resources:
+    """resources with all their definitions, only parts if given"""
+    resources: Resources = Resources({})
+    positions = read_positions(cursor, 'resources')
+    query = """SELECT oempart, description, uom, unitprice, oem, vendorpart,
+                      vendor, updated, dealer_net, file, row, used
+               FROM resources"""
+    if parts is None:
+        cursor.execute(query + " ORDER BY id")
+    else:
+        cursor.execute(query + " WHERE oempart IN (SELECT value FROM "
+                       "json_each(?)) ORDER BY id", (json_list(parts),))
+    for *fields, file, row, used in sorted(
+            cursor.fetchall(), key=lambda row: positions.get(row[0], 0)):
+        fields[7] = date_value(fields[7])
+        resource = Resource(*fields)
+        resources.sources.setdefault(resource.oempart, []).append(
+            ResourceSource(file, row, resource))
+        if used:
+            resources.resources[resource.oempart] = resource
+    return resources
+
+def read_boms(cursor: Cursor, names: Optional[list[str]] = None) -> Boms:
+    """BOMs with their sizes, hours, sections and parts, only names if
+    given"""
+    where = ""
+    params: tuple[str, ...] = ()
+    if names is not None:
+        where, params = ("WHERE {} IN (SELECT value FROM json_each(?))",
+                         (json_list(names),))
+    positions = read_positions(cursor, 'boms')
+    cursor.execute("SELECT name, beam, smallest, biggest FROM boms " +
+                   where.format('name'), params)
+    boms: Boms = Boms({
+        name: Bom(name, beam, smallest, biggest, {}, {})
+        for name, beam, smallest, biggest in sorted(
+            cursor.fetchall(), key=lambda row: positions.get(row[0], 0))})
+    cursor.execute("SELECT bom, size FROM bom_sizes " +
+                   where.format('bom') + " ORDER BY id", params)
+    for name, size in cursor.fetchall():
+        boms.boms[name].sizes[size] = {}
+    cursor.execute("SELECT bom, size, hours, value FROM bom_hours " +
+                   where.format('bom') + " ORDER BY id", params)
+    for name, size, hours, value in cursor.fetchall():
+        boms.boms[name].sizes[size][hours] = value
+    cursor.execute("SELECT bom, name FROM bom_sections " +
+                   where.format('bom') + " ORDER BY id", params)
+    for name, section in cursor.fetchall():
+        boms.boms[name].sections[section] = BomSection(section, {})
+    cursor.execute("""SELECT bom, section, part, qty, smallest, biggest,
+                             percent FROM bom_parts """ +
+                   where.format('bom') + " ORDER BY id", params)
+    for name, section, *fields in cursor.fetchall():
+        part = BomPart(*fields)
+        boms.boms[name].sections[section].parts.setdefault(
+            part.part, []).append(part)
+    return boms
+
+def read_bom_names(cursor: Cursor) -> list[str]:
+    """names of all BOMs in order"""
+    positions = read_positions(cursor, 'boms')
+    cursor.execute("SELECT name FROM boms")
+    return sorted((name for (name,) in cursor.fetchall()),
+                  key=lambda name: positions.get(name, 0))
+
+def read_models(cursor: Cursor) -> Models:
+    """sheets combined into each costing sheet"""
+    positions = read_positions(cursor, 'models')
+    cursor.execute("SELECT sheet1, sheet2, folder FROM models")
+    return Models({
+        folder: Model(sheet1, sheet2, folder)
+        for sheet1, sheet2, folder in sorted(
+            cursor.fetchall(), key=lambda row: positions.get(row[2], 0))})
+
+def read_settings(cursor: Cursor
+                  ) -> tuple[Consumables, HourlyRates, MarkUps]:
+    """consumable rates, hourly rates and mark ups"""
+    positions = read_positions(cursor, 'settings')
+    fields: dict[str, dict[str, float]] = {}
+    cursor.execute("SELECT kind, name, field, value FROM settings "
+                   "ORDER BY id")
+    for kind, name, field, value in cursor.fetchall():
+        fields.setdefault(setting_key(kind, name), {})[field] = value
+    settings: dict[str, dict[str, Any]] = {kind: {} for kind in SETTINGS}
+    for key in sorted(fields, key=lambda key: positions.get(key, 0)):
+        kind, name = entry_key('settings', key)
+        settings[kind][name] = SETTINGS[kind](**fields[key])
+    return (Consumables(settings['consumables']),
+            HourlyRates(settings['hourly_rates']),
+            MarkUps(settings['mark_ups']))
+
+
+class LazyBoms(Mapping):
+    """
+    BOMs by name, each read from the catalog the first time it is looked
+    up. Only the size most recently used BOMs are kept. The connection
+    stays in the read transaction the names were read in, so every BOM
+    comes from the same save. Use as:
+
+        with LazyBoms(connection, names) as boms:
+            if 'BOAT 22' in boms:       # does not read the BOM
+                bom = boms['BOAT 22']
+
+    Arguments:
+        connection: Connection -- catalog, in a read transaction
+        names: list[str] -- names of all BOMs in the catalog
+        size: int -- most BOMs kept at once
+    """
+    def __init__(self,
+                 connection: Connection,
+                 names: list[str],
+                 size: int = LAZY_BOMS) -> None:
+        self.connection: Connection = connection
+        self.names: dict[str, None] = dict.fromkeys(names)
+        self.size: int = size
+        self.hydrated: OrderedDict[str, Bom] = OrderedDict()
+
+    def __getitem__(self, name: str) -> Bom:
+        if name in self.hydrated:
+            self.hydrated.move_to_end(name)
+            return self.hydrated[name]
+        if name not in self.names:
+            raise KeyError(name)
+        status_msg(f"    reading BOM {name}", 3)
+        bom = read_boms(self.connection.cursor(), [name]).boms[name]
+        self.hydrated[name] = bom
+        if len(self.hydrated) > self.size:
+            self.hydrated.popitem(last=False)
+        return bom
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __enter__(self) -> 'LazyBoms':
+        return self
+
+    def __exit__(self, exc_class, exc, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """end the read transaction, nothing may be looked up after this"""
+        self.connection.rollback()
+        self.connection.close()
+
+
+# High Level Functions ========================================================
+def read_built(cursor: Cursor) -> dict[str, str]:
+    """when each phase was last read from its spreadsheets"""
+    cursor.execute("SELECT phase, built FROM phases")
+    return dict(cursor.fetchall())
+
+def load_from_database(db_file: Union[Path, str],
+                       phases: Collection[str] = tuple(PHASES),
+                       lazy: bool = False
+                       ) -> tuple[Boms, Consumables, HourlyRates, MarkUps,
+                                  Models, Resources]:
+    """read phases from the catalog, other phases are returned empty
+
+    Arguments:
+        db_file: Path|str -- catalog to read
+        phases: Collection[str] -- phases to read, see PHASES
+        lazy: bool -- read each BOM only when it is used, see LazyBoms
+
+    Raises:
+        CatalogError -- not a catalog or written by another version
+
+    Returns:
+        tuple -- boms, consumables, hourly_rates, mark_ups, models, resources
+    """
+    file_message("Reading Data from {file_name}", db_file)
+    if not Path(db_file).exists() or not is_catalog_file(db_file):
+        raise CatalogError(f"{db_file} is not a catalog, save it with -s")
+    boms, models, resources = Boms({}), Models({}), Resources({})
+    consumables, hourly_rates, mark_ups = (
+        Consumables({}), HourlyRates({}), MarkUps({}))
+    connection = dbconnect(db_file)
+    cursor = connection.cursor()
+    # every phase from the same save even if another run saves meanwhile
+    cursor.execute("BEGIN")
+    try:
+        check_catalog_version(cursor)
+        built = read_built(cursor)
+        for phase in phases:
+            status_msg(f"  {phase} read {built.get(phase, 'never')}", 1)
+        if 'settings' in phases:
+            consumables, hourly_rates, mark_ups = read_settings(cursor)
+        if 'boms' in phases and lazy:
+            boms = Boms(LazyBoms(connection,  # type: ignore
+                                 read_bom_names(cursor)))
+        elif 'boms' in phases:
+            boms = read_boms(cursor)
+        if 'models' in phases:
+            models = read_models(cursor)
+        if 'resources' in phases:
+            resources = read_resources(cursor)
+    except BaseException:
+        connection.close()
+        raise
+    # LazyBoms keeps the read transaction open until it is closed
+    if not isinstance(boms.boms, LazyBoms):
+        connection.rollback()
+        connection.close()
+    return boms, consumables, hourly_rates, mark_ups, models, resources
+
+def save_to_database(db_file: Union[Path, str],
+                     boms: Boms,
+                     consumables: Consumables,
+                     hourly_rates: HourlyRates,
+                     mark_ups: MarkUps,
+                     models: Models,
+                     resources: Resources,
+                     phases: Collection[str] = tuple(PHASES)) -> None:
+    """save phases to the catalog, tables of other phases are kept as they
+    are
+
+    Only entries (a part with all its definitions, a BOM, a model or a
+    setting) whose hash differs from the one stored are written, and
+    entries no longer there are removed, so saving after a small edit
+    writes little. A file in the old pickled format, or a catalog of
+    another version, is replaced by a new catalog with every phase.
+
+    Returns:
+        None
+    """
+    file_message("Saving Data to {file_name}", db_file)
+    if not is_catalog_file(db_file):
+        Path(db_file).unlink()
+    with dbopen(db_file) as cursor:
+        # one write transaction, readers see all of this save or none of it
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("PRAGMA user_version")
+        if cursor.fetchone()[0] != CATALOG_VERSION:
+            phases = tuple(PHASES)
+            for table in (*TABLES, 'entries', 'phases'):
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        create_catalog_schema(cursor)
+        cursor.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+        for phase in phases:
+            save_phase(cursor, phase, phase_entries(
+                phase, boms, consumables, hourly_rates, mark_ups, models,
+                resources))
+        cursor.executemany("""
+            INSERT OR REPLACE INTO phases (phase, built) VALUES (?, ?)""", [
+                (phase, datetime.now().isoformat(' ', 'seconds'))
+                for phase in phases])
+
+def compact_database(db_file: Union[Path, str]) -> None:
+    """fold the write-ahead log into the catalog, release the space of
+    replaced entries and refresh index statistics
+
+    Returns:
+        None
+    """
+    file_message("Compacting {file_name}", db_file)
+    with dbopen(db_file) as cursor:
+        check_catalog_version(cursor)
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        cursor.execute("VACUUM")
+        cursor.execute("ANALYZE")
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# vim expandtab shiftwidth=4 softtabstop=4
+"""
+Differences between two catalogs saved by save_to_database
+
+The entries table of each catalog holds a hash of every entry (a part with
+all its definitions, a BOM, a model or a setting), so comparing the hashes
+finds what changed without reading any entry. Only the changed entries
+are then read from both catalogs and broken down into fields, the time
+taken grows with the number of changes, not the size of the catalogs.
+
+Each line of the report is one field:
+
+    resources P00500: unitprice 12.5 -> 13.25
+    boms BOAT 22: 22' Paint Hours 10 -> 12
+    boms BOAT 22: FABRICATION P00501 qty (none) -> 2.0
+    settings mark_ups Boat and options: markup_1 0.9 -> 0.92
+"""
+from contextlib import closing
+from dataclasses import asdict
+from pathlib import Path
+from sqlite3 import connect, Connection, Cursor
+from typing import Any, Union
+from .boms import Bom
+from .catalog import (check_catalog_version, entry_key, is_catalog_file,
+                      read_boms, read_built, read_models, read_resources,
+                      read_settings, setting_key, CatalogError, PHASES,
+                      SETTINGS)
+from .resources import ResourceSource
+
+MISSING = '(none)'
+
+
+def open_read_only(db_file: Union[Path, str]) -> Connection:
+    """open a catalog without changing it, no journal mode is set and
+    nothing is committed, so archived catalogs stay as they are"""
+    return connect(f"{Path(db_file).resolve().as_uri()}?mode=ro", uri=True)
+
+def read_hashes(cursor: Cursor) -> dict[str, dict[Any, str]]:
+    """hash of every entry by phase and name"""
+    hashes: dict[str, dict[Any, str]] = {phase: {} for phase in PHASES}
+    cursor.execute("SELECT phase, name, hash FROM entries")
+    for phase, name, digest in cursor.fetchall():
+        hashes.setdefault(phase, {})[name] = digest
+    return hashes
+
+def changed_names(old: dict[Any, str], new: dict[Any, str]) -> list[Any]:
+    """entries added, removed or whose hash differs, in the new order"""
+    return ([name for name, digest in new.items() if old.get(name) != digest]
+            + [name for name in old if name not in new])
+
+def resource_fields(sources: list[ResourceSource],
+                    used: Any) -> dict[str, Any]:
+    """fields of a part: the definition in use and where it came from"""
+    fields: dict[str, Any] = {'definitions': len(sources)}
+    for source in sources:
+        if source.resource is used:
+            fields['source'] = f"{source.file} row {source.row}"
+            fields |= asdict(source.resource)
+    return fields
+
+def bom_fields(bom: Bom) -> dict[str, Any]:
+    """fields of a BOM: header, hours per size and each part of a section"""
+    fields: dict[str, Any] = {'beam': bom.beam, 'smallest': bom.smallest,
+                              'biggest': bom.biggest}
+    for size, labor in bom.sizes.items():
+        fields[f"{size} size"] = True
+        for hours, value in labor.items():
+            fields[f"{size} {hours}"] = value
+    for section in bom.sections.values():
+        fields[f"{section.name} section"] = True
+        for part, parts in section.parts.items():
+            for number, bom_part in enumerate(parts, start=1):
+                name = f"{section.name} {part}" + (
+                    f" #{number}" if number > 1 else "")
+                for field, value in asdict(bom_part).items():
+                    if field != 'part':
+                        fields[f"{name} {field}"] = value
+    return fields
+
+def entry_fields(phase: str, cursor: Cursor,
+                 names: list[Any]) -> dict[Any, dict[str, Any]]:
+    """fields of the named entries of phase, entries not there are left
+    out"""
+    if phase == 'resources':
+        resources = read_resources(cursor, names)
+        return {part: resource_fields(sources, resources.resources.get(part))
+                for part, sources in resources.sources.items()}
+    if phase == 'boms':
+        return {name: bom_fields(bom)
+                for name, bom in read_boms(cursor, names).boms.items()}
+    wanted = set(names)
+    if phase == 'models':
+        return {folder: asdict(model)
+                for folder, model in read_models(cursor).models.items()
+                if folder in wanted}
+    settings = dict(zip(SETTINGS, read_settings(cursor)))
+    return {setting_key(kind, name): asdict(value)
+            for kind, values in settings.items()
+            for name, value in getattr(values, kind).items()
+            if setting_key(kind, name) in wanted}
+
+def field_changes(old: dict[str, Any], new: dict[str, Any]) -> list[str]:
+    """field old -> new for each field that differs"""
+    return [f"{field} {old.get(field, MISSING)} -> {new.get(field, MISSING)}"
+            for field in {**new, **old}
+            if old.get(field, MISSING) != new.get(field, MISSING)]
+
+def entry_title(phase: str, name: Any) -> str:
+    """phase and entry name as shown in the report"""
+    if phase == 'settings':
+        return f"{phase} {' '.join(map(str, entry_key(phase, name)))}"
+    return f"{phase} {name}"
+
+def diff_report(old_file: Union[Path, str],
+                new_file: Union[Path, str]) -> list[str]:
+    """one line per changed field of every entry that differs
+
+    Raises:
+        CatalogError -- either file is not a catalog of this version
+
+    Returns:
+        list[str] -- report lines, empty if the catalogs hold the same
+    """
+    for db_file in (old_file, new_file):
+        if not Path(db_file).exists() or not is_catalog_file(db_file):
+            raise CatalogError(f"{db_file} is not a catalog, save it with -s")
+    lines: list[str] = []
+    with closing(open_read_only(old_file)) as old_connection, \
+            closing(open_read_only(new_file)) as new_connection:
+        old, new = old_connection.cursor(), new_connection.cursor()
+        check_catalog_version(old)
+        check_catalog_version(new)
+        old_built, new_built = read_built(old), read_built(new)
+        old_hashes, new_hashes = read_hashes(old), read_hashes(new)
+        for phase in PHASES:
+            names = changed_names(old_hashes[phase], new_hashes[phase])
+            if not names:
+                continue
+            lines.append(f"{phase}: {len(names)} changed, read "
+                         f"{old_built.get(phase, 'never')} and "
+                         f"{new_built.get(phase, 'never')}")
+            old_fields = entry_fields(phase, old, names)
+            new_fields = entry_fields(phase, new, names)
+            for name in names:
+                title = entry_title(phase, name)
+                if name not in old_fields:
+                    lines.append(f"{title}: added")
+                elif name not in new_fields:
+                    lines.append(f"{title}: removed")
+                else:
+                    # parts or sizes only put in another order hash
+                    # differently but show no changed field
+                    lines.extend(f"{title}: {change}" for change in
+                                 field_changes(old_fields[name],
+                                               new_fields[name]))
+    return lines
+
+if __name__ == "__main__":
+    pass
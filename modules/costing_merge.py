@@ -4,79 +4,116 @@
 """
 Costing Sheets Merge Boat and Cabin BOMs
 """
-from copy import deepcopy
-from .boms import Bom, BomSection, MergedBom, MergedPart, MergedSection
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Optional
+from .boms import Bom, MergedBom, MergedPart, MergedSection
+from .quantities import part_quantities
 from .models import Model
-from .utilities import logger
+from .resources import find_resource, Resource
+from .utilities import entry_hash, logger
+
+def part_order(name: str) -> Callable[[tuple[str, MergedPart]], Any]:
+    """sort key of (part number, part) items for a section. Outftting is
+    sorted by vender then part number. All other sections are ordered by
+    part number"""
+    if name != 'OUTFITTING':
+        return lambda kv: kv[0]
+    return lambda kv: (kv[1].vendor, kv[0])
 
 def ordered_parts(section: MergedSection) -> None:
-    """set correct sort order for parts for each section. Outftting is sorted
-    by vender then part number. All other sections are ordered by part number
+    """set correct sort order for parts for each section
 
     Arguments:
         section: -- section name and parts
 
     Returns:
-        list[str] -- Correctly ordered list of keys
+        None
     """
-    if section.name != 'OUTFITTING':
-        section.parts = dict(
-            sorted(section.parts.items(), key=lambda kv: (kv)))
-        return
     section.parts = dict(sorted(section.parts.items(),
-                           key=lambda kv: (kv[1].vendor, kv[0])))
+                                key=part_order(section.name)))
 
-def merge_sections(boat_sections: dict[str, BomSection],
+def merge_sections(bom: Bom,
+                   resources: dict[str, Resource],
                    size: str) -> dict[str, MergedSection]:
     """merge all sections by filtering out parts and applying qty
-    adujustments
+    adujustments, part pricing is taken from resources
 
     Arguments:
+        bom -- boat or cabin bom
+        resources -- all resources by oem part number
+        size -- size of boat to merge for
 
     Returns:
         sections -- list of the resutling merged sections
 
     """
     merged_sections: dict[str, MergedSection] = {}
-    if not boat_sections:
-        return merged_sections
-    for section_name, section in boat_sections.items():
+    for section_name, quantities in part_quantities(bom, size).items():
         merged_section = MergedSection(section_name, {})
         merged_sections[section_name] = merged_section
-        for part_number in section.parts:
-            bom_parts = section.parts[part_number]
-            if not bom_parts:
-                continue
-            if part_number not in merged_section.parts:
-                merged_section.parts[part_number] = MergedPart(
-                    bom_parts[0].part,
-                    0.0,
-                    bom_parts[0].description,
-                    bom_parts[0].uom,
-                    bom_parts[0].unitprice,
-                    bom_parts[0].vendor,
-                    bom_parts[0].updated,
-                    0.0,
-                    bom_parts[0].dealer_net
-                )
-            merged_part = merged_section.parts[part_number]
-            for bom_part in bom_parts:
-                if (bom_part.smallest > 0 and not
-                    bom_part.smallest <=
-                    float(size) <=
-                    bom_part.biggest):
-                    continue
-                factor = (1 if not bom_part.percent
-                          else float(size) / bom_part.percent)
-                merged_part.qty = merged_part.qty + bom_part.qty  * factor
-                merged_part.total = merged_part.qty * merged_part.unitprice
+        for part_number, qty in quantities.items():
+            # parts that do not fit the size are still listed, with no qty
+            resource = find_resource(resources, part_number)
+            merged_section.parts[part_number] = MergedPart(
+                part_number,
+                0.0 if qty is None else qty,
+                resource.description,
+                resource.uom,
+                resource.unitprice,
+                resource.vendor,
+                resource.updated,
+                0.0 if qty is None else qty * resource.unitprice,
+                resource.dealer_net
+            )
         merged_section.total = sum([merged_section.parts[key].total
                                     for key in merged_section.parts])
         ordered_parts(merged_section)
     return merged_sections
 
+def bom_digest(bom: Bom) -> str:
+    """hash of bom as the catalog stores it, worked out once per Bom"""
+    if not bom.digest:
+        bom.digest = entry_hash(bom)
+    return bom.digest
+
+
+@dataclass
+class MergeCache():
+    """
+    Merged sections by bom name, size and bom hash, so a boat or cabin
+    shared by several models is merged once per size. Merged sections are
+    shared between MergedBoms and must not be changed. One cache per
+    resources, as prices are not part of the key. Use as:
+
+        cache = MergeCache()
+        merged_bom = get_bom(boms, resources, model, size, cache)
+    """
+    sections: dict[tuple[str, str, str], dict[str, MergedSection]] = field(
+        default_factory=dict)
+    hits: int = 0
+    misses: int = 0
+
+    def merge_sections(self,
+                       bom: Bom,
+                       resources: dict[str, Resource],
+                       size: str) -> dict[str, MergedSection]:
+        """merge_sections, or the sections merged before"""
+        key = (bom.name, size, bom_digest(bom))
+        if key in self.sections:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.sections[key] = merge_sections(bom, resources, size)
+        return self.sections[key]
+
+    def report(self) -> str:
+        """hits and misses for status messages"""
+        return (f"  {self.misses} bom sizes merged, {self.hits} reused "
+                f"from cache")
+
+
 def merge_labor(boat_bom: Bom, cabin_bom: Bom, size: str) -> dict[str, float]:
-    """combine labor for boat and cabin
+    """combine labor for boat and cabin, neither bom is changed
 
     Arguments:
         boat_bom -- bom with sizes/labors
@@ -84,9 +121,9 @@ def merge_labor(boat_bom: Bom, cabin_bom: Bom, size: str) -> dict[str, float]:
         size -- size of boat to use
 
     Returns:
-        boat_labor -- combined labor hours
+        boat_labor -- new dict of combined labor hours
     """
-    boat_labor = boat_bom.sizes[size]
+    boat_labor = dict(boat_bom.sizes[size])
     cabin_labor = cabin_bom.sizes.get("0", {})
     if size in cabin_bom.sizes:
         cabin_labor = cabin_bom.sizes[size]
@@ -95,34 +132,93 @@ def merge_labor(boat_bom: Bom, cabin_bom: Bom, size: str) -> dict[str, float]:
         boat_labor[dept] += hours
     return boat_labor
 
+def add_parts(boat_part: MergedPart, cabin_part: MergedPart) -> MergedPart:
+    """new part with qty and total of a part in both boat and cabin"""
+    return replace(boat_part,
+                   qty=boat_part.qty + cabin_part.qty,
+                   total=boat_part.total + cabin_part.total)
+
+def merge_parts(boat_parts: dict[str, MergedPart],
+                cabin_parts: dict[str, MergedPart],
+                order: Callable[[tuple[str, MergedPart]], Any]
+                ) -> dict[str, MergedPart]:
+    """combine parts already sorted by order in one pass, the result is
+    sorted by order too
+
+    Arguments:
+        boat_parts -- parts of boat section
+        cabin_parts -- parts of cabin section
+        order -- sort key both are sorted by, see part_order
+
+    Returns:
+        parts -- parts of both, parts in both have their qty/total added
+    """
+    parts: dict[str, MergedPart] = {}
+    boat = list(boat_parts.items())
+    cabin = list(cabin_parts.items())
+    boat_index = cabin_index = 0
+    while boat_index < len(boat) and cabin_index < len(cabin):
+        boat_key = order(boat[boat_index])
+        cabin_key = order(cabin[cabin_index])
+        if boat_key < cabin_key:
+            part_number, part = boat[boat_index]
+            boat_index += 1
+        elif cabin_key < boat_key:
+            part_number, part = cabin[cabin_index]
+            cabin_index += 1
+        else:
+            part_number = boat[boat_index][0]
+            part = add_parts(boat[boat_index][1], cabin[cabin_index][1])
+            boat_index += 1
+            cabin_index += 1
+        parts[part_number] = part
+    parts.update(boat[boat_index:])
+    parts.update(cabin[cabin_index:])
+    return parts
+
 def combine_sections(boat_sections: dict[str, MergedSection],
                      cabin_sections: dict[str, MergedSection]
                     ) -> dict[str, MergedSection]:
-    """combine sections"""
-    if not cabin_sections:
-        return boat_sections
+    """combine sections, neither is changed, parts in both are new
+    MergedParts and the others are shared
+
+    Sections are paired by position. Merged sections are already sorted,
+    so a pair with the same name is combined in one pass, a pair whose
+    names differ may be sorted another way and is sorted again.
+    """
+    sections = dict(boat_sections)
     for boat_section, cabin_section in zip(boat_sections.values(),
                                            cabin_sections.values()):
-        boat_parts = boat_section.parts
-        cabin_parts = cabin_section.parts
-        boat_section.total += cabin_section.total
-        for part_number in cabin_parts:
-            if part_number in  boat_parts:
-                boat_parts[part_number].qty += cabin_parts[part_number].qty
-                boat_parts[part_number].total += cabin_parts[part_number].total
-            else:
-                boat_parts[part_number] = cabin_parts[part_number]
-        ordered_parts(boat_section)
-    return boat_sections
-
-
-def merge_boms(boat_bom: Bom, cabin_bom: Bom, size: str) -> MergedBom:
+        section = MergedSection(boat_section.name, {},
+                                boat_section.total + cabin_section.total)
+        if boat_section.name == cabin_section.name:
+            section.parts = merge_parts(boat_section.parts,
+                                        cabin_section.parts,
+                                        part_order(boat_section.name))
+        else:
+            section.parts = dict(boat_section.parts)
+            for part_number, cabin_part in cabin_section.parts.items():
+                section.parts[part_number] = (
+                    add_parts(section.parts[part_number], cabin_part)
+                    if part_number in section.parts else cabin_part)
+            ordered_parts(section)
+        sections[boat_section.name] = section
+    return sections
+
+
+def merge_boms(boat_bom: Bom,
+               cabin_bom: Bom,
+               resources: dict[str, Resource],
+               size: str,
+               cache: Optional[MergeCache] = None) -> MergedBom:
     """Merge bom and hours
 
     Arguments:
         boat_bom -- boat size/labor parts
         cabin_bom - cabin size/labor parts
+        resources -- all resources by oem part number
         size -- size of boat we want to create MergedBom for
+        cache -- reuse sections merged for other models
 
     Returns:
         MergedBom
@@ -131,20 +227,31 @@ def merge_boms(boat_bom: Bom, cabin_bom: Bom, size: str) -> MergedBom:
     cabin_sections: dict[str, MergedSection]
     sections: dict[str, MergedSection]
 
-    boat_sections = merge_sections(boat_bom.sections, size)
-    cabin_sections = merge_sections(cabin_bom.sections, size)
+    merge = cache.merge_sections if cache else merge_sections
+    boat_sections = merge(boat_bom, resources, size)
+    cabin_sections = merge(cabin_bom, resources, size)
     sections = combine_sections(boat_sections, cabin_sections)
     labor = merge_labor(boat_bom, cabin_bom, size)
     return MergedBom(boat_bom.name, boat_bom.beam, size, labor, sections)
 
-def get_bom(boms: dict[str, Bom], model: Model, size: str) -> MergedBom:
+def get_bom(boms: dict[str, Bom],
+            resources: dict[str, Resource],
+            model: Model,
+            size: str,
+            cache: Optional[MergeCache] = None) -> MergedBom:
     """Merges sheets if necessary and returns a BOM.
     Assumes if sheet is not None that there will be a match
 
+    The boms are only read, the MergedBom is built from new objects so
+    the same boms serve every model and size without being copied.
+
     Arguments:
         bom: list[Bom] --
+        resources: dict[str, Resource] -- pricing for bom parts
         model: Model -- sheet1 can not be None and must be found
                         sheet2 can be None but *must* be found if not None
+        size: str -- size of boat
+        cache: MergeCache -- reuse sections merged for other models
 
     Returns:
         Bom -- Returns new Bom of combined Bom(s)
@@ -152,12 +259,12 @@ def get_bom(boms: dict[str, Bom], model: Model, size: str) -> MergedBom:
     boat_bom: Bom
     cabin_bom: Bom
 
-    boat_bom = (deepcopy(boms[model.sheet1])
+    boat_bom = (boms[model.sheet1]
                 if model.sheet1 in boms
                 else  Bom('', "", 0.0, 0.0, {}, {}))
-    cabin_bom = (deepcopy(boms[model.sheet2])
+    cabin_bom = (boms[model.sheet2]
                  if model.sheet2 in boms
                  else  Bom('', "", 0.0, 0.0, {}, {}))
     if boat_bom.name == "":
         logger.debug("boat_bom not found error %s", model.sheet1)
-    return merge_boms(boat_bom, cabin_bom, size)
+    return merge_boms(boat_bom, cabin_bom, resources, size, cache)
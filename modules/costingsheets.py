@@ -11,10 +11,11 @@ from .boms import Bom, MergedBom
 from .costing_data import (FileNameInfo, SectionInfo, XlsxBom,
                            BOM_COLUMNS, BOM_STYLES)
 from .costing_headers import generate_header
-from .costing_merge import get_bom
+from .costing_merge import get_bom, MergeCache
 from .costing_sections import generate_sections
 from .costing_totals import generate_totals
 from .models import Model
+from .resources import Resource
 from .settings import Settings
 from .utilities import normalize_size, status_msg, SHEETS_FOLDER, SUBJECT
 from . import config
@@ -110,8 +111,10 @@ def generate_sheet(merged_bom: MergedBom,
 
 # MODEL/SIZE IETERATION FUNCTIONS =============================================
 def generate_sheets_for_model(boms: dict[str, Bom],
+                              resources: dict[str, Resource],
                               model: Model,
-                              settings: Settings) -> None:
+                              settings: Settings,
+                              cache: MergeCache) -> None:
     """"cycle through each size to create sheets
     * build the filname and size as as a text name
     * filter out parts that are not needed for this size of boat and correct
@@ -120,8 +123,10 @@ def generate_sheets_for_model(boms: dict[str, Bom],
 
     Arguments:
         boms --  all boats/cabin boms
+        resources -- pricing for bom parts
         model -- Model of boat to process
         settings -- consumables, labor rates, mark ups
+        cache -- sections already merged for other models
 
     Returns:
         None
@@ -131,11 +136,12 @@ def generate_sheets_for_model(boms: dict[str, Bom],
         file_name_info: FileNameInfo
         file_name_info = build_name(size, model, model.folder)
         status_msg(f"    {file_name_info['file_name']}", 2)
-        merged_bom: MergedBom = get_bom(boms, model, size)
+        merged_bom: MergedBom = get_bom(boms, resources, model, size, cache)
         generate_sheet(merged_bom, file_name_info, settings, str(size))
 
 
 def generate_sheets_for_all_models(boms: dict[str, Bom],
+                                   resources: dict[str, Resource],
                                    models: dict[str, Model],
                                    settings: Settings) -> None:
     """" cycle through each sheet/option combo to create sheets
@@ -143,6 +149,7 @@ def generate_sheets_for_all_models(boms: dict[str, Bom],
     Arguments:
         target_parts -- model info for boats/cabins
         source_parts -- all boms for boats/cabins
+        resources -- pricing for bom parts
         settings -- consumables, labor rates, mark ups
 
     Returns:
@@ -151,8 +158,11 @@ def generate_sheets_for_all_models(boms: dict[str, Bom],
     status_msg("Generating Sheets", 1)
     if config.hgac:
         status_msg("Generating HGAC Sheets", 0)
+    cache = MergeCache()
     for model in models:
-        generate_sheets_for_model(boms, models[model], settings)
+        generate_sheets_for_model(boms, resources, models[model], settings,
+                                  cache)
+    status_msg(cache.report(), 1)
 
 if __name__ == "__main__":
     pass
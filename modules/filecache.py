@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# vim expandtab shiftwidth=4 softtabstop=4
+"""
+Per file cache of parsed spreadsheets
+
+Each spreadsheet in RESOURCES_FOLDER and BOATS_FOLDER is parsed into its
+own Resources/Bom object. The parsed object is pickled into a sqlite table
+together with a fingerprint of the file (size + modification time, and
+optionally a sha256 of the contents). On the next run only files whose
+fingerprint changed are parsed again.
+
+With hashing enabled a file whose modification time changed but whose
+contents did not (copied, touched, restored from backup) is still a hit.
+"""
+from dataclasses import dataclass
+from hashlib import sha256
+from pathlib import Path
+from pickle import dumps, loads, UnpicklingError
+from sqlite3 import Binary, Cursor
+from typing import Any, Callable, Optional, TypeVar, Union
+from .databases import dbopen
+from .utilities import status_msg
+from .workers import map_files, Pipeline
+
+T = TypeVar('T')
+
+# bump when the parsed objects change shape so old entries are re-parsed
+CACHE_VERSION = 3
+
+
+@dataclass
+class Fingerprint():
+    """what identifies one version of a file, touched is set when only the
+    contents hash matched and the stored mtime needs refreshing"""
+    size: int
+    mtime: int
+    digest: str = ''
+    touched: bool = False
+
+
+def file_digest(xlsx_file: Path) -> str:
+    """sha256 of file contents"""
+    digest = sha256()
+    with open(xlsx_file, 'rb') as source:
+        for block in iter(lambda: source.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def create_cache_schema(cursor: Cursor) -> None:
+    """create cache table if necessary"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS file_cache (
+            kind    varchar(20) not null,
+            path    text not null,
+            version integer not null,
+            size    integer not null,
+            mtime   integer not null,
+            digest  text not null,
+            value   blob not null,
+            primary key (kind, path))""")
+
+
+class FileCache():
+    """
+    Parsed objects of spreadsheets keyed on their fingerprint. Use as:
+
+        cache = FileCache(cache_file, hashing=False)
+        parsed = cache.map_files(load_bom, bom_files, 'boms', jobs)
+
+    Arguments:
+        path: Path|str -- sqlite file to keep cache in
+        hashing: bool -- also compare sha256 of contents
+    """
+    def __init__(self, path: Union[Path, str], hashing: bool = False) -> None:
+        self.path: Union[Path, str] = path
+        self.hashing: bool = hashing
+
+    def fingerprint(self, xlsx_file: Path) -> Fingerprint:
+        """current fingerprint of file, digest is filled in lazily"""
+        stat = xlsx_file.stat()
+        return Fingerprint(stat.st_size, stat.st_mtime_ns)
+
+    def is_current(self, xlsx_file: Path, fingerprint: Fingerprint,
+                   row: tuple) -> bool:
+        """does the cached row still describe the file"""
+        version, size, mtime, digest = row
+        if version != CACHE_VERSION or size != fingerprint.size:
+            return False
+        if mtime == fingerprint.mtime:
+            fingerprint.digest = digest
+            return True
+        if not self.hashing:
+            return False
+        fingerprint.digest = fingerprint.digest or file_digest(xlsx_file)
+        fingerprint.touched = digest == fingerprint.digest
+        return fingerprint.touched
+
+    def lookup(self, kind: str,
+               fingerprints: dict[Path, Fingerprint]) -> dict[Path, Any]:
+        """fetch cached objects whose fingerprint still matches
+
+        Arguments:
+            kind: str -- type of objects, 'resources' or 'boms'
+            fingerprints: dict[Path, Fingerprint] -- files wanted
+
+        Returns:
+            dict[Path, Any] -- cached objects for unchanged files
+        """
+        found: dict[Path, Any] = {}
+        with dbopen(self.path) as cursor:
+            create_cache_schema(cursor)
+            cursor.execute("""SELECT path, version, size, mtime, digest, value
+                              FROM file_cache WHERE kind = ?""", (kind,))
+            for path, *row, value in cursor.fetchall():
+                xlsx_file = Path(path)
+                if (xlsx_file in fingerprints and
+                        self.is_current(xlsx_file, fingerprints[xlsx_file],
+                                        tuple(row))):
+                    try:
+                        found[xlsx_file] = loads(value)
+                    except (UnpicklingError, AttributeError, EOFError):
+                        continue
+        return found
+
+    def store(self, kind: str,
+              fingerprints: dict[Path, Fingerprint],
+              parsed: dict[Path, Any]) -> None:
+        """save freshly parsed objects and forget files that are gone
+
+        Arguments:
+            kind: str -- type of objects, 'resources' or 'boms'
+            fingerprints: dict[Path, Fingerprint] -- every current file
+            parsed: dict[Path, Any] -- objects parsed this run
+
+        Returns:
+            None
+        """
+        for xlsx_file in parsed:
+            if self.hashing and not fingerprints[xlsx_file].digest:
+                fingerprints[xlsx_file].digest = file_digest(xlsx_file)
+        with dbopen(self.path) as cursor:
+            create_cache_schema(cursor)
+            cursor.execute("SELECT path FROM file_cache WHERE kind = ?",
+                           (kind,))
+            gone = [(kind, path) for (path,) in cursor.fetchall()
+                    if Path(path) not in fingerprints]
+            cursor.executemany(
+                "DELETE FROM file_cache WHERE kind = ? AND path = ?", gone)
+            cursor.executemany("""
+                INSERT OR REPLACE INTO file_cache
+                    (kind, path, version, size, mtime, digest, value)
+                VALUES (?, ?, ?, ?, ?, ?, ?)""", [
+                    (kind, str(xlsx_file), CACHE_VERSION,
+                     fingerprints[xlsx_file].size,
+                     fingerprints[xlsx_file].mtime,
+                     fingerprints[xlsx_file].digest,
+                     Binary(dumps(value)))
+                    for xlsx_file, value in parsed.items()])
+
+    def map_files(self, func: Callable[..., T],
+                  files: list[Path],
+                  kind: str,
+                  jobs: int = 1,
+                  pipeline: Optional[Pipeline] = None) -> list[T]:
+        """workers.map_files that only parses files that changed
+
+        Arguments:
+            func: Callable -- picklable module level function or partial
+            files: list[Path] -- files to parse
+            kind: str -- type of objects, 'resources' or 'boms'
+            jobs: int -- worker processes, 1 runs in this process, 0 per cpu
+            pipeline: Pipeline -- read changed files ahead on threads
+
+        Returns:
+            list -- results in the same order as files
+        """
+        fingerprints = {xlsx_file: self.fingerprint(xlsx_file)
+                        for xlsx_file in files}
+        results: dict[Path, Any] = self.lookup(kind, fingerprints)
+        changed = [xlsx_file for xlsx_file in files
+                   if xlsx_file not in results]
+        parsed = dict(zip(changed, map_files(func, changed, jobs,
+                                                pipeline=pipeline)))
+        self.store(kind, fingerprints, parsed | {
+            xlsx_file: value for xlsx_file, value in results.items()
+            if fingerprints[xlsx_file].touched})
+        results.update(parsed)
+        status_msg(f"  {len(files) - len(changed)} {kind} files cached, "
+                   f"{len(changed)} parsed", 1)
+        return [results[xlsx_file] for xlsx_file in files]
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# vim expandtab shiftwidth=4 softtabstop=4
+"""
+Shared/exclusive advisory locks on open files
+
+Many processes can hold a shared lock on a file at the same time, an
+exclusive lock is only granted when no other lock is held. Locks are
+released when unlocked or when the file is closed.
+
+Uses flock() on POSIX and LockFileEx() on Windows.
+"""
+import sys
+from typing import BinaryIO
+
+if sys.platform == 'win32':
+    import ctypes
+    import msvcrt  # pylint: disable=import-error
+    from ctypes import wintypes
+
+    LOCKFILE_FAIL_IMMEDIATELY = 0x1
+    LOCKFILE_EXCLUSIVE_LOCK = 0x2
+    ERROR_LOCK_VIOLATION = 33
+    WHOLE_FILE = 0xFFFFFFFF
+
+    class Overlapped(ctypes.Structure):  # pylint: disable=R0903
+        """OVERLAPPED structure, only the offset of the range is used"""
+        _fields_ = [('internal', ctypes.c_void_p),
+                    ('internal_high', ctypes.c_void_p),
+                    ('offset', wintypes.DWORD),
+                    ('offset_high', wintypes.DWORD),
+                    ('event', wintypes.HANDLE)]
+
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+
+    def lock_file(stream: BinaryIO,
+                  shared: bool,
+                  blocking: bool = True) -> bool:
+        """lock whole file, returns False if not blocking and held"""
+        flags = 0 if shared else LOCKFILE_EXCLUSIVE_LOCK
+        if not blocking:
+            flags |= LOCKFILE_FAIL_IMMEDIATELY
+        handle = msvcrt.get_osfhandle(stream.fileno())
+        if kernel32.LockFileEx(handle, flags, 0, WHOLE_FILE, WHOLE_FILE,
+                               ctypes.byref(Overlapped())):
+            return True
+        error = ctypes.get_last_error()
+        if error == ERROR_LOCK_VIOLATION and not blocking:
+            return False
+        raise ctypes.WinError(error)
+
+    def unlock_file(stream: BinaryIO) -> None:
+        """release lock taken with lock_file"""
+        handle = msvcrt.get_osfhandle(stream.fileno())
+        kernel32.UnlockFileEx(handle, 0, WHOLE_FILE, WHOLE_FILE,
+                              ctypes.byref(Overlapped()))
+else:
+    import fcntl
+
+    def lock_file(stream: BinaryIO,
+                  shared: bool,
+                  blocking: bool = True) -> bool:
+        """lock whole file, returns False if not blocking and held"""
+        operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            operation |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(stream.fileno(), operation)
+        except BlockingIOError:
+            return False
+        return True
+
+    def unlock_file(stream: BinaryIO) -> None:
+        """release lock taken with lock_file"""
+        fcntl.flock(stream.fileno(), fcntl.LOCK_UN)
+
+if __name__ == "__main__":
+    pass
@@ -8,10 +8,8 @@ Pass in master_file return data structure
 from dataclasses import dataclass
 from dataclasses_json import DataClassJsonMixin
 from pathlib import Path
-from openpyxl import load_workbook # pylint: disable=import-error
-from openpyxl.worksheet.worksheet import Worksheet
-from openpyxl.workbook.workbook import Workbook
 from .utilities import status_msg
+from .workbooks import sheet_values
 
 @dataclass
 class MarkUp(DataClassJsonMixin):
@@ -25,7 +23,7 @@ class MarkUps(DataClassJsonMixin):
     """Mark-up rates by deprtment dictonary"""
     mark_ups: dict[str, MarkUp]
 
-def load_mark_ups(xlsx_file: Path) -> MarkUps:
+def load_mark_ups(xlsx_file: Path, reader: str = 'openpyxl') -> MarkUps:
     """read makrkup file into object """
     status_msg('Loading Mark Ups', 1)
     status_msg(f'  {xlsx_file.name}', 2)
@@ -33,19 +31,15 @@ def load_mark_ups(xlsx_file: Path) -> MarkUps:
     mark_up: MarkUp
     mark_ups: MarkUps = MarkUps({})
 
-    xlsx: Workbook = load_workbook(xlsx_file.as_posix(), data_only=True)
-    sheet: Worksheet = xlsx.active
-
-    for row in sheet.iter_rows(min_row=2, max_col=4):
-        policy, discount = [row[0].value, row[3].value]
-        markup_1, markup_2 = [row[1].value, row[2].value]
+    for row in sheet_values(xlsx_file, reader, min_row=2, max_col=4):
+        policy, discount = [row[0], row[3]]
+        markup_1, markup_2 = [row[1], row[2]]
         if not isinstance(policy, str):
             continue
         mark_up = MarkUp(float(markup_1), float(markup_2), float(discount))
         mark_ups.mark_ups[policy] = mark_up
         status_msg(f"    {policy:22.22} {markup_1:.2f} / {markup_2:.2f}  "
                    f"{discount * 100:5.2f}%", 3)
-    xlsx.close()
     return mark_ups
 
 if __name__ == "__main__":
@@ -9,10 +9,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 from dataclasses_json import DataClassJsonMixin
-from openpyxl  import load_workbook # pylint: disable=import-error
-from openpyxl.worksheet.worksheet import Worksheet
-from openpyxl.workbook.workbook import Workbook
 from .utilities import status_msg
+from .workbooks import sheet_values
 
 @dataclass
 class Model(DataClassJsonMixin):
@@ -26,23 +24,19 @@ class Models(DataClassJsonMixin):
     """Dictionary of all models"""
     models: dict[str, Model]
 
-def load_models(xlsx_file: Path) -> Models:
+def load_models(xlsx_file: Path, reader: str = 'openpyxl') -> Models:
     """Build master list of sheets to combine to create costing sheets"""
     status_msg('Loading Boat Models', 1)
-    xlsx: Workbook = load_workbook(
-        xlsx_file.as_posix(), data_only=True)
-    sheet: Worksheet = xlsx.active
     all_models: Models = Models({})
-    for row in sheet.iter_rows(min_row=2, max_col=3):
-        if not isinstance(row[0].value, str):
+    for row in sheet_values(xlsx_file, reader, min_row=2, max_col=3):
+        if not isinstance(row[0], str):
             continue
         model: Model = Model(
-            row[0].value,
-            row[1].value,
-            row[2].value)
+            row[0],
+            row[1],
+            row[2])
         all_models.models[model.folder] = model
         status_msg(f"    {model}", 3)
-    xlsx.close()
     return all_models
 
 if __name__ == "__main__":
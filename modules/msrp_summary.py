@@ -10,8 +10,9 @@ from pathlib import Path
 from xlsxwriter import Workbook # type: ignore
 from .boms import Bom, MergedBom
 from .costing_data import Columns, FileNameInfo, Format, Xlsx
-from .costing_merge import get_bom
+from .costing_merge import get_bom, MergeCache
 from .models import Model
+from .resources import Resource
 from .settings import Settings
 from .utilities import normalize_size, status_msg, SHEETS_FOLDER, SUMMARY
 
@@ -243,9 +244,11 @@ def get_big_ticket_items(merged_bom: MergedBom, settings: Settings) -> float:
 
 # MODEL/SIZE IETERATION FUNCTIONS =============================================
 def get_msrp(boms: dict[str, Bom],
+             resources: dict[str, Resource],
              model: Model,
              settings: Settings,
-             size: str) -> tuple[str, float]:
+             size: str,
+             cache: MergeCache) -> tuple[str, float]:
     """"cycle through each size to create sheets
     * build the filname and size as as a text name
     * filter out parts that are not needed for this size of boat and correct
@@ -254,8 +257,10 @@ def get_msrp(boms: dict[str, Bom],
 
     Arguments:
         boms --  all boats/cabin boms
+        resources -- pricing for bom parts
         model -- Model of boat to process
         settings -- consumables, labor rates, mark ups
+        cache -- sections already merged for other models
 
     Returns:
         None
@@ -265,7 +270,7 @@ def get_msrp(boms: dict[str, Bom],
     file_name_info: FileNameInfo
     file_name_info = build_name(size, model, model.folder)
     status_msg(f"    {file_name_info['file_name']}", 2)
-    merged_bom: MergedBom = get_bom(boms, model, size)
+    merged_bom: MergedBom = get_bom(boms, resources, model, size, cache)
     msrp: float = (
         get_boat_and_options(merged_bom, settings) +
         get_big_ticket_items(merged_bom, settings)
@@ -278,6 +283,7 @@ def get_msrp(boms: dict[str, Bom],
 
 
 def generate_msrp_summary(boms: dict[str, Bom],
+                          resources: dict[str, Resource],
                           models: dict[str, Model],
                           settings: Settings) -> None:
     """" cycle through each sheet/option combo to create report
@@ -285,6 +291,7 @@ def generate_msrp_summary(boms: dict[str, Bom],
     Arguments:
         target_parts -- model info for boats/cabins
         source_parts -- all boms for boats/cabins
+        resources -- pricing for bom parts
         settings -- consumables, labor rates, mark ups
 
     Returns:
@@ -296,6 +303,7 @@ def generate_msrp_summary(boms: dict[str, Bom],
     msrps: dict[str, Msrp] = {}
     models = dict(sorted(models.items()))
     model_index = set()
+    cache = MergeCache()
 
     for model in models.values():
         model_index.add(model.sheet1)
@@ -303,8 +311,10 @@ def generate_msrp_summary(boms: dict[str, Bom],
 
         status_msg(f"  {model.folder}", 1)
         for size in boms[model.sheet1].sizes:
-            name, msrp = get_msrp(boms, model, settings, size)
+            name, msrp = get_msrp(boms, resources, model, settings, size,
+                                  cache)
             msrps[name] = Msrp(msrp, SHADES[index], model)
+    status_msg(cache.report(), 1)
 
     file_name = SHEETS_FOLDER / (SUMMARY + '.xlsx')
     with Workbook(file_name, {'remove_timezone': True}) as workbook:
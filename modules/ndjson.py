@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# vim expandtab shiftwidth=4 softtabstop=4
+"""
+Export/import the catalog as newline delimited JSON
+
+One JSON object per line, "kind" tells what it holds:
+    catalog      -- first line, format version
+    consumable   -- name, rate
+    hourly_rate  -- name, rate
+    mark_up      -- name, markup_1, markup_2, discount
+    model        -- sheet1, sheet2, folder
+    resource     -- one definition of a part: file, row, used and the
+                    Resource fields, used is true for the one in use
+    bom          -- Bom fields, sizes as {size: {hours: value}} and
+                    sections as [{name, parts: [BomPart fields]}]
+
+Lines are written one object at a time, so BOMs read lazily from the
+catalog or snapshot are never all in memory, and other tools can read
+the file a line at a time. Encoding is done by hand for the few types a
+cell can hold rather than through to_json() of each dataclass, decoding
+parses each line with json and builds the dataclasses directly. Dates are
+written as ISO 8601 text and Resource.updated is parsed back.
+"""
+import os
+from dataclasses import fields
+from datetime import date, datetime, time
+from json import loads
+from json.encoder import encode_basestring_ascii as quote  # type: ignore
+from math import isfinite
+from pathlib import Path
+from typing import Any, Callable, Iterator, Union
+from .boms import Bom, BomPart, Boms, BomSection
+from .consumables import Consumable, Consumables
+from .databases import file_message
+from .hourlyrates import HourlyRate, HourlyRates
+from .markups import MarkUp, MarkUps
+from .models import Model, Models
+from .resources import Resource, Resources, ResourceSource
+from .utilities import status_msg, NRBError
+
+NDJSON_VERSION = 1
+
+RESOURCE_FIELDS = tuple(field.name for field in fields(Resource))
+PART_FIELDS = tuple(field.name for field in fields(BomPart))
+MODEL_FIELDS = tuple(field.name for field in fields(Model))
+MARK_UP_FIELDS = tuple(field.name for field in fields(MarkUp))
+
+
+class NdjsonError(NRBError):
+    """File is not a catalog export this version can read"""
+
+
+# ENCODE ======================================================================
+def encode_value(value: Any) -> str:
+    """cell value as JSON, NaN and infinity become null"""
+    # pylint: disable=too-many-return-statements
+    if value is None:
+        return 'null'
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if isinstance(value, float):
+        return float.__repr__(value) if isfinite(value) else 'null'
+    if isinstance(value, str):
+        return quote(value)
+    if isinstance(value, (date, time)):
+        return quote(value.isoformat())
+    return quote(str(value))
+
+def encode_fields(obj: Any, names: tuple[str, ...]) -> str:
+    """attributes of obj as JSON object members"""
+    return ','.join(f'"{name}":{encode_value(getattr(obj, name))}'
+                    for name in names)
+
+def encode_mapping(mapping: dict[str, Any],
+                   encode: Callable[[Any], str]) -> str:
+    """dict with text keys as JSON object"""
+    return '{' + ','.join(f'{quote(str(key))}:{encode(value)}'
+                          for key, value in mapping.items()) + '}'
+
+def encode_resource(source: ResourceSource, used: bool) -> str:
+    """line of one definition of a part"""
+    return (f'{{"kind":"resource","file":{encode_value(source.file)},'
+            f'"row":{encode_value(source.row)},"used":{encode_value(used)},'
+            f'{encode_fields(source.resource, RESOURCE_FIELDS)}}}\n')
+
+def encode_section(section: BomSection) -> str:
+    """section with its parts as JSON object"""
+    return (f'{{"name":{encode_value(section.name)},"parts":[' +
+            ','.join('{' + encode_fields(part, PART_FIELDS) + '}'
+                     for parts in section.parts.values()
+                     for part in parts) + ']}')
+
+def encode_sizes(sizes: dict[str, dict[str, float]]) -> str:
+    """labor hours of each size as JSON object"""
+    return encode_mapping(
+        sizes, lambda labor: encode_mapping(labor, encode_value))
+
+def encode_bom(bom: Bom) -> str:
+    """line of one BOM"""
+    return (f'{{"kind":"bom",'
+            f'{encode_fields(bom, ("name", "beam", "smallest", "biggest"))},'
+            f'"sizes":{encode_sizes(bom.sizes)},"sections":['
+            + ','.join(encode_section(section)
+                       for section in bom.sections.values())
+            + ']}\n')
+
+def export_lines(boms: Boms,
+                 consumables: Consumables,
+                 hourly_rates: HourlyRates,
+                 mark_ups: MarkUps,
+                 models: Models,
+                 resources: Resources) -> Iterator[str]:
+    """every line of an export, built as it is written"""
+    yield f'{{"kind":"catalog","version":{NDJSON_VERSION}}}\n'
+    for name, consumable in consumables.consumables.items():
+        yield (f'{{"kind":"consumable","name":{encode_value(name)},'
+               f'"rate":{encode_value(consumable.rate)}}}\n')
+    for name, hourly_rate in hourly_rates.hourly_rates.items():
+        yield (f'{{"kind":"hourly_rate","name":{encode_value(name)},'
+               f'"rate":{encode_value(hourly_rate.rate)}}}\n')
+    for name, mark_up in mark_ups.mark_ups.items():
+        yield (f'{{"kind":"mark_up","name":{encode_value(name)},'
+               f'{encode_fields(mark_up, MARK_UP_FIELDS)}}}\n')
+    for model in models.models.values():
+        yield f'{{"kind":"model",{encode_fields(model, MODEL_FIELDS)}}}\n'
+    for part, sources in resources.sources.items():
+        used = resources.resources.get(part)
+        for source in sources:
+            yield encode_resource(source, source.resource is used)
+    for bom in boms.boms.values():
+        yield encode_bom(bom)
+
+def export_catalog(ndjson_file: Union[Path, str],
+                   boms: Boms,
+                   consumables: Consumables,
+                   hourly_rates: HourlyRates,
+                   mark_ups: MarkUps,
+                   models: Models,
+                   resources: Resources) -> None:
+    """write everything to ndjson_file, replacing it once complete
+
+    Returns:
+        None
+    """
+    file_message("Exporting to {file_name}", ndjson_file)
+    partial = Path(str(ndjson_file) + '.partial')
+    lines = 0
+    with open(partial, 'w', encoding='utf-8', newline='\n') as stream:
+        for line in export_lines(boms, consumables, hourly_rates, mark_ups,
+                                 models, resources):
+            stream.write(line)
+            lines += 1
+    os.replace(partial, ndjson_file)
+    status_msg(f"  {lines} lines exported", 1)
+
+
+# DECODE ======================================================================
+def decode_datetime(value: Any) -> Any:
+    """ISO 8601 text back to datetime, anything else as it is"""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+def decode_resource(record: dict[str, Any]) -> ResourceSource:
+    """definition of a part from a resource line"""
+    resource = Resource(*[record[name] for name in RESOURCE_FIELDS])
+    resource.updated = decode_datetime(resource.updated)
+    return ResourceSource(record['file'], record['row'], resource)
+
+def decode_bom(record: dict[str, Any]) -> Bom:
+    """BOM from a bom line"""
+    sections: dict[str, BomSection] = {}
+    for section in record['sections']:
+        parts: dict[str, list[BomPart]] = {}
+        for values in section['parts']:
+            part = BomPart(*[values[name] for name in PART_FIELDS])
+            parts.setdefault(part.part, []).append(part)
+        sections[section['name']] = BomSection(section['name'], parts)
+    return Bom(record['name'], record['beam'], record['smallest'],
+               record['biggest'], record['sizes'], sections)
+
+def import_catalog(ndjson_file: Union[Path, str]
+                   ) -> tuple[Boms, Consumables, HourlyRates, MarkUps,
+                              Models, Resources]:
+    """read an export, the same tuple as catalog.load_from_database
+
+    Lines of a kind this version does not know are skipped.
+
+    Raises:
+        NdjsonError -- not an export, or a line is not valid
+
+    Returns:
+        tuple -- boms, consumables, hourly_rates, mark_ups, models, resources
+    """
+    # pylint: disable=too-many-locals
+    file_message("Importing from {file_name}", ndjson_file)
+    boms, models, resources = Boms({}), Models({}), Resources({})
+    consumables, hourly_rates, mark_ups = (
+        Consumables({}), HourlyRates({}), MarkUps({}))
+    with open(ndjson_file, encoding='utf-8') as stream:
+        try:
+            header = loads(stream.readline() or '{}')
+        except ValueError:
+            header = {}
+        if header != {'kind': 'catalog', 'version': NDJSON_VERSION}:
+            raise NdjsonError(f"{ndjson_file} is not a version "
+                              f"{NDJSON_VERSION} catalog export")
+        for number, line in enumerate(stream, start=2):
+            try:
+                record = loads(line)
+                kind = record['kind']
+                if kind == 'resource':
+                    source = decode_resource(record)
+                    part = source.resource.oempart
+                    resources.sources.setdefault(part, []).append(source)
+                    if record['used']:
+                        resources.resources[part] = source.resource
+                elif kind == 'bom':
+                    bom = decode_bom(record)
+                    boms.boms[bom.name] = bom
+                elif kind == 'model':
+                    model = Model(*[record[name] for name in MODEL_FIELDS])
+                    models.models[model.folder] = model
+                elif kind == 'consumable':
+                    consumables.consumables[record['name']] = Consumable(
+                        record['rate'])
+                elif kind == 'hourly_rate':
+                    hourly_rates.hourly_rates[record['name']] = HourlyRate(
+                        record['rate'])
+                elif kind == 'mark_up':
+                    mark_ups.mark_ups[record['name']] = MarkUp(
+                        *[record[name] for name in MARK_UP_FIELDS])
+            except (ValueError, KeyError, TypeError) as error:
+                raise NdjsonError(f"{ndjson_file} line {number}: "
+                                  f"{error!r}") from None
+    status_msg(f"  {len(resources.resources)} resources, {len(boms.boms)} "
+               f"boms, {len(models.models)} models imported", 1)
+    return boms, consumables, hourly_rates, mark_ups, models, resources
+
+if __name__ == "__main__":
+    pass
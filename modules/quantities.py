@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# vim expandtab shiftwidth=4 softtabstop=4
+"""
+Part quantities of a BOM for every hull size at once
+
+Each BomPart counts for a size when it has no smallest size or the size is
+from smallest to biggest, and is scaled by size / percent when it has a
+percent (FT parts). Rather than checking every BomPart once per size, all
+BomParts of a BOM are laid out as rows and all sizes as columns of one
+matrix, so the range checks and scaling are done for every size in one
+pass.
+
+Sizes that are not lengths (such as a name) only get the BomParts with no
+range or percent, a BomPart that needs the length raises ValueError just
+as merging one size at a time did.
+
+With NumPy installed the matrix is built with array operations, otherwise
+with plain lists. Both add the BomParts of a part number in the order they
+are listed, starting from 0.0, exactly as one at a time would, so the
+results are the same to the last bit.
+"""
+from typing import Optional
+from .boms import Bom, BomPart
+
+try:
+    import numpy as np  # pylint: disable=import-error
+except ImportError:
+    np = None  # type: ignore  # pylint: disable=invalid-name
+
+HAVE_NUMPY = np is not None
+
+# section name to part number to qty, None if no BomPart applies
+Quantities = dict[str, dict[str, Optional[float]]]
+
+
+def is_length(size: str) -> bool:
+    """can size be merged, sizes only asked for are checked when used"""
+    try:
+        float(size)
+    except ValueError:
+        return False
+    return True
+
+def part_rows(bom: Bom) -> tuple[list[tuple[str, list[str]]], list[int],
+                                 list[BomPart]]:
+    """BomParts of bom as matrix rows, the rows of a part number are next
+    to each other
+
+    Returns:
+        tuple -- each section with its part numbers, group (part number)
+                 of each row, BomPart of each row
+    """
+    sections: list[tuple[str, list[str]]] = []
+    groups: list[int] = []
+    rows: list[BomPart] = []
+    count = 0
+    for name, section in bom.sections.items():
+        numbers: list[str] = []
+        for part_number, bom_parts in section.parts.items():
+            if not bom_parts:
+                continue
+            numbers.append(part_number)
+            groups.extend([count] * len(bom_parts))
+            rows.extend(bom_parts)
+            count += 1
+        sections.append((name, numbers))
+    return sections, groups, rows
+
+def python_matrix(groups: list[int],
+                  rows: list[BomPart],
+                  lengths: list[float],
+                  count: int) -> list[list[Optional[float]]]:
+    """qty of each group for each length, None where no row applies
+
+    Returns:
+        list -- one list per length of the qty of each group
+    """
+    matrix: list[list[Optional[float]]] = [[None] * count for _ in lengths]
+    for group, bom_part in zip(groups, rows):
+        smallest, biggest = bom_part.smallest, bom_part.biggest
+        for column, length in zip(matrix, lengths):
+            if smallest > 0 and not smallest <= length <= biggest:
+                continue
+            factor = (1 if not bom_part.percent
+                      else length / bom_part.percent)
+            qty = column[group]
+            column[group] = (0.0 if qty is None else qty) + (
+                bom_part.qty * factor)
+    return matrix
+
+def numpy_matrix(groups: list[int],
+                 rows: list[BomPart],
+                 lengths: list[float],
+                 count: int) -> list[list[Optional[float]]]:
+    """python_matrix with array operations"""
+    columns = np.array(lengths, dtype=float)
+    qty, smallest, biggest, percent = np.array(
+        [(row.qty, row.smallest, row.biggest, row.percent) for row in rows],
+        dtype=float).T[:, :, None]
+    applies = ~(smallest > 0) | ((smallest <= columns) & (columns <= biggest))
+    factor = np.divide(np.broadcast_to(columns, applies.shape), percent,
+                       out=np.ones(applies.shape), where=percent != 0)
+    terms = qty * factor
+    # add the n-th row of every group at once, n = 0, 1, ... so rows are
+    # added in the order they are listed, skipped ones not even as 0.0
+    group_of = np.array(groups, dtype=np.intp)
+    starts = np.flatnonzero(np.r_[True, group_of[1:] != group_of[:-1]])
+    members = np.diff(np.r_[starts, len(rows)])
+    totals = np.zeros((count, len(lengths)))
+    found = np.zeros((count, len(lengths)), dtype=bool)
+    for member in range(int(members.max())):
+        group_index = np.flatnonzero(members > member)
+        row_index = starts[group_index] + member
+        hit = applies[row_index]
+        totals[group_index] = np.where(
+            hit, totals[group_index] + terms[row_index], totals[group_index])
+        found[group_index] |= hit
+    matrix = totals.astype(object)
+    matrix[~found] = None
+    return matrix.T.tolist()
+
+def text_column(groups: list[int],
+                rows: list[BomPart],
+                size: str,
+                count: int) -> list[Optional[float]]:
+    """qty of each group for a size that is not a length
+
+    Raises:
+        ValueError -- a row has a range or percent, so needs a length
+    """
+    column: list[Optional[float]] = [None] * count
+    for group, bom_part in zip(groups, rows):
+        if bom_part.smallest > 0 or bom_part.percent:
+            float(size)
+        qty = column[group]
+        column[group] = (0.0 if qty is None else qty) + bom_part.qty
+    return column
+
+def size_quantities(bom: Bom,
+                    sizes: list[str],
+                    vectorized: bool = HAVE_NUMPY) -> dict[str, Quantities]:
+    """qty of each part number in each section for each of sizes
+
+    Arguments:
+        bom: Bom -- bom to look at, it is not changed
+        sizes: list[str] -- hull sizes
+        vectorized: bool -- use NumPy, only if it is installed
+
+    Returns:
+        dict[str, Quantities] -- quantities by size
+    """
+    sections, groups, rows = part_rows(bom)
+    count = sum(len(numbers) for _, numbers in sections)
+    lengths = [size for size in sizes if is_length(size)]
+    matrix = (numpy_matrix if vectorized and rows and lengths
+              else python_matrix)(
+                  groups, rows, [float(size) for size in lengths], count)
+    columns = dict(zip(lengths, matrix))
+    quantities: dict[str, Quantities] = {}
+    for size in sizes:
+        column = (columns[size] if size in columns
+                  else text_column(groups, rows, size, count))
+        quantities[size] = {}
+        start = 0
+        for name, numbers in sections:
+            quantities[size][name] = dict(
+                zip(numbers, column[start:start + len(numbers)]))
+            start += len(numbers)
+    return quantities
+
+def part_quantities(bom: Bom, size: str) -> Quantities:
+    """qty of each part number in each section for one hull size
+
+    The first size asked for works out every size of the bom in one pass
+    and keeps them on the bom, so every model using the bom shares them.
+
+    Arguments:
+        bom: Bom -- bom to look at, only quantities is changed
+        size: str -- hull size
+
+    Returns:
+        Quantities -- section name to part number to qty, None if no BomPart
+                      of that part number applies to the size
+    """
+    if size not in bom.quantities:
+        bom.quantities |= size_quantities(bom, [size] + [
+            other for other in bom.sizes
+            if other != size and other not in bom.quantities and
+            is_length(other)])
+    return bom.quantities[size]
+
+if __name__ == "__main__":
+    pass
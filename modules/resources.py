@@ -4,16 +4,22 @@
 Load resource data from sheet
 
 If I1 has "Dealer Net Price" then there is net pricing to capture
+
+A part can be on more than one resource sheet, or twice on the same sheet.
+Every place it is defined is kept as a ResourceSource and the one with the
+newest updated date is used. On equal dates the later sheet (by name) or
+the later row wins, so the price used never depends on directory order.
 """
 from datetime import datetime
 from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
 from typing import Optional
 from dataclasses_json import DataClassJsonMixin
-from openpyxl import load_workbook # pylint: disable=import-error
-from openpyxl.worksheet.worksheet import Worksheet
-from openpyxl.workbook.workbook import Workbook
+from .filecache import FileCache
 from .utilities import status_msg
+from .workbooks import sheet_values
+from .workers import map_files, Pipeline
 
 
 @dataclass(order=True)
@@ -31,45 +37,130 @@ class Resource(DataClassJsonMixin):
     updated: datetime = field(compare=False)
     dealer_net: float = field(compare=False)
 
+@dataclass
+class ResourceSource(DataClassJsonMixin):
+    """One definition of a part, sheet name and row it was read from"""
+    file: str
+    row: int
+    resource: Resource
+
 @dataclass
 class Resources(DataClassJsonMixin):
-    """Dictionary of all resources"""
+    """Dictionary of all resources, and every definition of each part"""
     resources: dict[str, Resource]
+    sources: dict[str, list[ResourceSource]] = field(default_factory=dict)
+
+def updated_key(resource: Resource) -> datetime:
+    """updated date to order definitions by, blank/text dates are oldest"""
+    if isinstance(resource.updated, datetime):
+        return resource.updated
+    return datetime.min
+
+def add_resource(resources: Resources, source: ResourceSource) -> None:
+    """record a definition and use it if it is at least as new as the one
+    in use
+
+    Arguments:
+        resources: Resources -- resources to add to
+        source: ResourceSource -- definition read from a sheet
+
+    Returns:
+        None
+    """
+    part = source.resource.oempart
+    resources.sources.setdefault(part, []).append(source)
+    current = resources.resources.get(part)
+    if (current is None or
+            updated_key(source.resource) >= updated_key(current)):
+        resources.resources[part] = source.resource
+
+def find_conflicts(resources: Resources) -> dict[str, list[ResourceSource]]:
+    """parts defined more than once with different prices
+
+    Arguments:
+        resources: Resources -- loaded resources
+
+    Returns:
+        dict[str, list[ResourceSource]] -- definitions of each such part
+    """
+    return {part: sources
+            for part, sources in resources.sources.items()
+            if len({(source.resource.unitprice, source.resource.dealer_net)
+                    for source in sources}) > 1}
+
+def conflict_report(resources: Resources) -> list[str]:
+    """describe conflicting parts, the definition in use is marked with *"""
+    lines: list[str] = []
+    for part, sources in sorted(find_conflicts(resources).items()):
+        lines.append(f"{part}")
+        for source in sources:
+            used = '*' if source.resource is resources.resources[part] else ' '
+            lines.append(f"  {used} {source.file:40.40} row {source.row:5} "
+                         f"{source.resource.unitprice:10.2f} "
+                         f"{source.resource.dealer_net:10.2f} "
+                         f"{source.resource.updated}")
+    return lines
+
+def find_resource(resources: dict[str, Resource], part: str) -> Resource:
+    """look up part, parts missing from RESOURCE get an Unknown placeholder
+
+    Arguments:
+        resources: dict[str, Resource] -- all resources by oem part number
+        part: str -- oem part number from a BOM
+
+    Returns:
+        Resource -- resource for part
+    """
+    # fww resolve at later point, we need to throw errors on fail
+    if part in resources:
+        return resources[part]
+    return Resource(part, "Unknown", "EA", 0.0, "Unknown", part,
+                    "Unknown", datetime(1999,12,31), 0.0)
 
 def find_excel_files_in_dir(base: Path) -> list[Path]:
-    """get list of spreadsheets in folder"""
-    return list(base.glob('[!~]*.xlsx'))
+    """get list of spreadsheets in folder sorted by name"""
+    return sorted(base.glob('[!~]*.xlsx'))
 
-def load_resource_file(xlsx_file: Path) -> Resources:
-    """Read resource sheet"""
+def load_resource_file(xlsx_file: Path,
+                       reader: str = 'openpyxl',
+                       content: Optional[bytes] = None) -> Resources:
+    """Read resource sheet, from content instead if it was read already"""
     status_msg(f'  {xlsx_file.name}', 2)
-    xlsx: Workbook = load_workbook(xlsx_file.as_posix(), data_only=True)
-    sheet: Worksheet = xlsx.active
-    net_price: bool = sheet['I1'].value == "Dealer Net Price"
+    rows = sheet_values(xlsx_file, reader, min_row=1, max_col=9,
+                        content=content)
+    header: tuple = next(rows, (None,) * 9)
+    net_price: bool = header[8] == "Dealer Net Price"
     all_resources: Resources = Resources({})
-    for row in sheet.iter_rows(min_row=2, max_col=9):
-        if not isinstance(row[0].value, str):
+    for number, row in enumerate(rows, start=2):
+        if not isinstance(row[0], str):
             continue
         net_value = 0.0
         if net_price:
-            net_value = float(row[8].value)
+            net_value = float(row[8])
         resource: Resource = Resource(
-            row[0].value,
-            row[1].value,
-            row[2].value,
-            float(row[3].value),
-            row[4].value,
-            row[5].value,
-            row[6].value,
-            row[7].value,
+            row[0],
+            row[1],
+            row[2],
+            float(row[3]),
+            row[4],
+            row[5],
+            row[6],
+            row[7],
             net_value)
-        all_resources.resources[row[0].value] = resource
+        add_resource(all_resources,
+                     ResourceSource(xlsx_file.name, number, resource))
         status_msg(f"    {resource}",3)
-    xlsx.close()
     return all_resources
 
-def load_resources(resource_folder: Path) -> Resources:
-    """Load all resource files"""
+def load_resources(resource_folder: Path,
+                   reader: str = 'openpyxl',
+                   jobs: int = 1,
+                   cache: Optional[FileCache] = None,
+                   pipeline: Optional[Pipeline] = None) -> Resources:
+    """Load all resource files, in parallel if jobs is not 1. Files are
+    merged in name order and the newest definition of a part is used.
+    With a cache only files changed since the last run are read, with a
+    pipeline files are read on threads while earlier ones are parsed"""
     status_msg('Loading Resources', 1)
     resource_files: list[Path] = [
         sheet
@@ -77,13 +168,18 @@ def load_resources(resource_folder: Path) -> Resources:
         if sheet.name.startswith('BOM ')]
 
     all_resources: Resources = Resources({})
-    for resource_file in resource_files:
-        if resource_file == "K:\2024 HGAC - TEST\RESOURCE\BOM OUTBOARD MOTORS.xlsx":
-            _ = 1 + 1
-            pass
-            _ = 1 + 1
-        all_resources.resources.update(
-            load_resource_file(resource_file).resources)
+    load = partial(load_resource_file, reader=reader)
+    for file_resources in (
+            cache.map_files(load, resource_files, 'resources', jobs, pipeline)
+            if cache else map_files(load, resource_files, jobs,
+                                    pipeline=pipeline)):
+        for sources in file_resources.sources.values():
+            for source in sources:
+                add_resource(all_resources, source)
+    conflicts = find_conflicts(all_resources)
+    if conflicts:
+        status_msg(f"  {len(conflicts)} parts have conflicting prices, "
+                   "see --conflicts", 1)
     return all_resources
 
 if __name__ == "__main__":
@@ -0,0 +1,635 @@
+#!/usr/bin/env python
+# vim expandtab shiftwidth=4 softtabstop=4
+"""
+Memory mapped columnar snapshot of the catalog
+
+Resources and BOM parts, the bulk of the data, are stored column by column:
+numbers as fixed width arrays and every other value as an index into one
+table of interned values. Opening a snapshot maps the file and reads only
+the small header (BOM names/sizes/sections, models and settings), so it
+takes about the same time however many parts there are. Resources and
+BOMs are built as they are looked up, and runs opening the same snapshot
+share its pages in the OS cache.
+
+Layout:
+    MAGIC                -- 8 bytes
+    codec                -- 7 bytes name, 1 byte level
+    header length        -- unsigned 64 bit
+    header               -- json, column offsets and the small tables
+    columns              -- each 8 byte aligned
+
+Everything after the codec can be compressed with zlib, bz2 or lzma, for
+snapshots kept on a network share where reading fewer bytes matters more
+than mapping the file. A compressed snapshot is read and decompressed
+into memory in one go, an uncompressed one is memory mapped.
+
+Resource rows are sorted by part number, every definition of a part next
+to each other in the order they were added, so a part is found by binary
+search. The parts of a BOM are one contiguous run of BOM part rows.
+
+Generations:
+    Each save writes a new generation file next to the snapshot, named
+    snapshot_file.000042, and then atomically replaces snapshot_file, a
+    one line pointer to the current generation. Writers take an exclusive
+    lock on snapshot_file.lock so one builds at a time, readers never take
+    it. A reader holds a shared lock on the generation it has open, old
+    generations are only removed once nobody holds them, so a run keeps
+    the snapshot it started with while the next one is published.
+"""
+import bz2
+import json
+import lzma
+import os
+import sys
+import zlib
+from array import array
+from io import BytesIO
+from collections.abc import Iterator, Mapping
+from datetime import date, datetime, time, timedelta
+from mmap import mmap, ACCESS_READ
+from pathlib import Path
+from time import sleep
+from typing import Any, BinaryIO, Callable, Optional, Union
+from .boms import Bom, BomPart, Boms, BomSection
+from .consumables import Consumable, Consumables
+from .databases import file_message
+from .filelock import lock_file, unlock_file
+from .hourlyrates import HourlyRate, HourlyRates
+from .markups import MarkUp, MarkUps
+from .models import Model, Models
+from .resources import Resource, Resources, ResourceSource
+from .utilities import NRBError
+
+MAGIC = b'NRBSNAP\x02'
+SNAPSHOT_VERSION = 2
+
+# codecs and their default level, only 'none' can be memory mapped
+CODECS: dict[str, int] = {'none': 0, 'zlib': 6, 'bz2': 9, 'lzma': 6}
+
+# generations kept besides the current one, older ones are removed when
+# no reader holds them
+KEEP_GENERATIONS = 2
+# times a reader follows the pointer again when a generation was removed
+# between reading the pointer and opening it
+OPEN_ATTEMPTS = 5
+
+RESOURCE_COLUMNS: dict[str, str] = {
+    'oempart': 'i', 'description': 'i', 'uom': 'i', 'unitprice': 'd',
+    'oem': 'i', 'vendorpart': 'i', 'vendor': 'i', 'updated': 'i',
+    'dealer_net': 'd', 'file': 'i', 'row': 'i', 'used': 'b'}
+PART_COLUMNS: dict[str, str] = {
+    'section': 'i', 'part': 'i', 'qty': 'd', 'smallest': 'd',
+    'biggest': 'd', 'percent': 'd'}
+
+
+class SnapshotError(NRBError):
+    """File is not a snapshot this version can read"""
+
+
+def encode_value(value: Any) -> str:
+    """cell value as text, first character tells the type"""
+    # pylint: disable=too-many-return-statements
+    if value is None:
+        return 'n'
+    if isinstance(value, bool):
+        return f'b{int(value)}'
+    if isinstance(value, int):
+        return f'i{value}'
+    if isinstance(value, float):
+        return f'f{value!r}'
+    if isinstance(value, str):
+        return 's' + value
+    if isinstance(value, datetime):
+        return 'D' + value.isoformat()
+    if isinstance(value, date):
+        return 'd' + value.isoformat()
+    if isinstance(value, time):
+        return 't' + value.isoformat()
+    if isinstance(value, timedelta):
+        return f'x{value.total_seconds()!r}'
+    raise SnapshotError(f"can not store {type(value).__name__} {value!r}")
+
+def decode_value(text: str) -> Any:
+    """reverse of encode_value"""
+    kind, rest = text[0], text[1:]
+    decoders: dict[str, Callable[[str], Any]] = {
+        'n': lambda _: None,
+        'b': lambda rest: bool(int(rest)),
+        'i': int,
+        'f': float,
+        's': str,
+        'D': datetime.fromisoformat,
+        'd': date.fromisoformat,
+        't': time.fromisoformat,
+        'x': lambda rest: timedelta(seconds=float(rest)),
+    }
+    return decoders[kind](rest)
+
+def compress(codec: str, level: int,
+             data: Union[bytes, memoryview]) -> bytes:
+    """compress data with one of CODECS"""
+    if codec == 'zlib':
+        return zlib.compress(data, level)
+    if codec == 'bz2':
+        return bz2.compress(data, max(level, 1))
+    if codec == 'lzma':
+        return lzma.compress(data, preset=level)
+    return bytes(data)
+
+def decompress(codec: str, data: bytes) -> bytes:
+    """reverse of compress"""
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    if codec == 'bz2':
+        return bz2.decompress(data)
+    if codec == 'lzma':
+        return lzma.decompress(data)
+    return data
+
+def align(stream: BinaryIO) -> None:
+    """pad stream to a multiple of 8 bytes"""
+    stream.write(b'\x00' * (-stream.tell() % 8))
+
+
+class ValueTable():
+    """interned cell values, each distinct value (and type) stored once"""
+    def __init__(self) -> None:
+        self.index: dict[str, int] = {}
+
+    def intern(self, value: Any) -> int:
+        """index of value in table"""
+        return self.index.setdefault(encode_value(value), len(self.index))
+
+    def columns(self) -> tuple[array, bytes]:
+        """offsets of each value in blob, and blob of utf-8 text"""
+        offsets = array('q', [0])
+        blob = bytearray()
+        for text in self.index:
+            blob += text.encode('utf-8')
+            offsets.append(len(blob))
+        return offsets, bytes(blob)
+
+
+# GENERATIONS =================================================================
+def generation_path(snapshot_file: Path, generation: int) -> Path:
+    """file holding one generation of snapshot_file"""
+    return snapshot_file.with_name(f"{snapshot_file.name}.{generation:06d}")
+
+def generations(snapshot_file: Path) -> dict[int, Path]:
+    """generation files on disk by number, oldest first"""
+    found: dict[int, Path] = {}
+    for path in snapshot_file.parent.glob(snapshot_file.name + '.*'):
+        suffix = path.name[len(snapshot_file.name) + 1:]
+        if suffix.isdigit():
+            found[int(suffix)] = path
+    return dict(sorted(found.items()))
+
+def current_generation(snapshot_file: Path) -> Path:
+    """generation snapshot_file points to, snapshot_file itself if it was
+    written before generations"""
+    with open(snapshot_file, 'rb') as stream:
+        text = stream.read(len(MAGIC))
+        if text == MAGIC:
+            return snapshot_file
+        text += stream.read(256)
+    name = text.decode('utf-8', errors='replace').strip()
+    if not name.startswith(snapshot_file.name + '.'):
+        raise SnapshotError(f"{snapshot_file} is not a snapshot")
+    return snapshot_file.with_name(name)
+
+def open_generation(snapshot_file: Path) -> BinaryIO:
+    """open current generation with a shared lock held until it is closed
+
+    Raises:
+        SnapshotError -- there is no snapshot yet, or generations were
+                         removed faster than followed
+    """
+    for _ in range(OPEN_ATTEMPTS):
+        try:
+            # returned open, the lock lasts until the caller closes it
+            stream = open(  # pylint: disable=consider-using-with
+                current_generation(snapshot_file), 'rb')
+        except FileNotFoundError:
+            if not snapshot_file.exists():
+                raise SnapshotError(
+                    f"{snapshot_file} does not exist, write it first by "
+                    "running without -l") from None
+            continue
+        lock_file(stream, shared=True)
+        # removed between open and lock, follow the pointer again
+        if os.fstat(stream.fileno()).st_nlink:
+            return stream
+        stream.close()
+    raise SnapshotError(f"{snapshot_file} changed {OPEN_ATTEMPTS} times "
+                        "while opening it")
+
+def publish(snapshot_file: Path, generation_file: Path) -> None:
+    """point snapshot_file at generation_file in one step"""
+    partial = Path(str(snapshot_file) + '.partial')
+    partial.write_text(generation_file.name + '\n', encoding='utf-8')
+    for attempt in range(OPEN_ATTEMPTS):
+        try:
+            os.replace(partial, snapshot_file)
+            return
+        except PermissionError:
+            # windows refuses while a reader has the pointer open
+            if attempt == OPEN_ATTEMPTS - 1:
+                raise
+            sleep(0.1)
+
+def prune_generations(snapshot_file: Path,
+                      keep: int = KEEP_GENERATIONS) -> None:
+    """remove all but the newest keep generations before the current one,
+    skipping those a reader still holds"""
+    for path in list(generations(snapshot_file).values())[:-(keep + 1)]:
+        try:
+            with open(path, 'rb') as stream:
+                if not lock_file(stream, shared=False, blocking=False):
+                    continue
+                if os.name != 'nt':
+                    path.unlink()
+            # windows can not remove a file that is open, even by us
+            if os.name == 'nt':
+                path.unlink()
+        except OSError:
+            continue
+
+
+# WRITE =======================================================================
+def resource_columns(resources: Resources,
+                     values: ValueTable) -> dict[str, array]:
+    """every definition of every part as columns, sorted by part"""
+    columns: dict[str, array] = {
+        name: array(code) for name, code in RESOURCE_COLUMNS.items()}
+    for part in sorted(resources.sources):
+        for source in resources.sources[part]:
+            resource = source.resource
+            for name in ('oempart', 'description', 'uom', 'oem',
+                         'vendorpart', 'vendor', 'updated'):
+                columns[name].append(values.intern(getattr(resource, name)))
+            columns['unitprice'].append(resource.unitprice)
+            columns['dealer_net'].append(resource.dealer_net)
+            columns['file'].append(values.intern(source.file))
+            columns['row'].append(source.row)
+            columns['used'].append(
+                resource is resources.resources.get(part))
+    return columns
+
+def bom_columns(boms: Boms,
+                values: ValueTable) -> tuple[dict[str, array], list[list]]:
+    """parts of all BOMs as columns, and the rest of each BOM for the
+    header"""
+    columns: dict[str, array] = {
+        name: array(code) for name, code in PART_COLUMNS.items()}
+    header: list[list] = []
+    for bom in boms.boms.values():
+        start = len(columns['part'])
+        for section in bom.sections.values():
+            for parts in section.parts.values():
+                for part in parts:
+                    columns['section'].append(values.intern(section.name))
+                    columns['part'].append(values.intern(part.part))
+                    columns['qty'].append(part.qty)
+                    columns['smallest'].append(part.smallest)
+                    columns['biggest'].append(part.biggest)
+                    columns['percent'].append(part.percent)
+        header.append([
+            values.intern(bom.name), values.intern(bom.beam),
+            bom.smallest, bom.biggest, start, len(columns['part']),
+            [[values.intern(size),
+              [[values.intern(hours), values.intern(value)]
+               for hours, value in labor.items()]]
+             for size, labor in bom.sizes.items()],
+            [values.intern(section) for section in bom.sections]])
+    return columns, header
+
+def save_snapshot(snapshot_file: Union[Path, str],
+                  boms: Boms,
+                  consumables: Consumables,
+                  hourly_rates: HourlyRates,
+                  mark_ups: MarkUps,
+                  models: Models,
+                  resources: Resources,
+                  codec: str = 'none',
+                  level: Optional[int] = None) -> None:
+    """write a snapshot as a new generation and point snapshot_file at it
+    once it is complete, readers of older generations are not disturbed
+
+    Arguments:
+        codec: str -- one of CODECS
+        level: int -- compression level, None for the codec default
+
+    Returns:
+        None
+    """
+    file_message("Saving Snapshot to {file_name}", snapshot_file)
+    level = CODECS[codec] if level is None else level
+    values = ValueTable()
+    columns = {f'resources.{name}': column for name, column in
+               resource_columns(resources, values).items()}
+    part_columns, bom_header = bom_columns(boms, values)
+    columns |= {f'parts.{name}': column
+                for name, column in part_columns.items()}
+    header: dict[str, Any] = {
+        'version': SNAPSHOT_VERSION,
+        'byteorder': sys.byteorder,
+        'boms': bom_header,
+        'models': [[values.intern(model.sheet1), values.intern(model.sheet2),
+                    values.intern(model.folder)]
+                   for model in models.models.values()],
+        'consumables': [[values.intern(name), consumable.rate]
+                        for name, consumable
+                        in consumables.consumables.items()],
+        'hourly_rates': [[values.intern(name), hourly_rate.rate]
+                         for name, hourly_rate
+                         in hourly_rates.hourly_rates.items()],
+        'mark_ups': [[values.intern(name), mark_up.markup_1,
+                      mark_up.markup_2, mark_up.discount]
+                     for name, mark_up in mark_ups.mark_ups.items()],
+        'columns': {},
+    }
+    offsets, blob = values.columns()
+    columns['values.offsets'] = offsets
+    # offsets of the columns follow the header, which holds the offsets,
+    # so place the columns relative to the end of the header first
+    place = 0
+    for name, column in columns.items():
+        header['columns'][name] = [place, column.typecode, len(column)]
+        place += len(column) * column.itemsize
+        place += -place % 8
+    header['columns']['values.blob'] = [place, 'B', len(blob)]
+    text = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    body = BytesIO()
+    body.write(len(text).to_bytes(8, 'little'))
+    body.write(text)
+    align(body)
+    for column in columns.values():
+        body.write(column.tobytes())
+        align(body)
+    body.write(blob)
+    snapshot_file = Path(snapshot_file)
+    with open(Path(str(snapshot_file) + '.lock'), 'ab') as writer:
+        lock_file(writer, shared=False)
+        generation_file = generation_path(snapshot_file, max(
+            generations(snapshot_file), default=0) + 1)
+        partial = Path(str(generation_file) + '.partial')
+        with open(partial, 'wb') as stream:
+            stream.write(MAGIC)
+            stream.write(codec.encode('ascii').ljust(7, b'\x00'))
+            stream.write(bytes([level]))
+            stream.write(compress(codec, level, body.getbuffer()))
+        os.replace(partial, generation_file)
+        publish(snapshot_file, generation_file)
+        prune_generations(snapshot_file)
+
+
+# READ ========================================================================
+class Snapshot():
+    """
+    Open snapshot, columns are views into the mapped file. Use as:
+
+        snapshot = Snapshot(snapshot_file)
+        resource = snapshot.resources['P00500']
+        bom = snapshot.boms['BOAT 22']
+
+    Raises:
+        SnapshotError -- not a snapshot or written by another version
+    """
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, snapshot_file: Union[Path, str]) -> None:
+        self.map: Optional[mmap] = None
+        self.columns: dict[str, memoryview] = {}
+        # stays open, and locked, while the generation is mapped
+        self.stream: Optional[BinaryIO] = open_generation(Path(snapshot_file))
+        stream = self.stream
+        if stream.read(len(MAGIC)) != MAGIC:
+            self.close_stream()
+            raise SnapshotError(f"{snapshot_file} is not a snapshot")
+        self.codec = stream.read(8)[:7].rstrip(b'\x00').decode('ascii')
+        if self.codec not in CODECS:
+            self.close_stream()
+            raise SnapshotError(f"{snapshot_file} uses unknown codec "
+                                f"{self.codec}")
+        if self.codec == 'none':
+            self.map = mmap(stream.fileno(), 0, access=ACCESS_READ)
+            self.view = memoryview(self.map)[len(MAGIC) + 8:]
+        else:
+            self.view = memoryview(decompress(self.codec, stream.read()))
+            self.close_stream()
+        length = int.from_bytes(self.view[:8], 'little')
+        self.header: dict[str, Any] = json.loads(
+            bytes(self.view[8:8 + length]))
+        if (self.header['version'] != SNAPSHOT_VERSION or
+                self.header['byteorder'] != sys.byteorder):
+            self.close()
+            raise SnapshotError(f"{snapshot_file} was written by another "
+                                "version, save it again")
+        self.start = 8 + length + (-(8 + length) % 8)
+        self.texts: dict[int, Any] = {}
+        self.built: dict[int, Resource] = {}
+        self.resources = SnapshotResources(self)
+        self.sources = SnapshotSources(self)
+        self.boms = SnapshotBoms(self)
+
+    def column(self, name: str) -> memoryview:
+        """numbers of a column, no copy is made"""
+        if name not in self.columns:
+            offset, code, count = self.header['columns'][name]
+            begin = self.start + offset
+            self.columns[name] = self.view[
+                begin:begin + count * array(code).itemsize].cast(code)
+        return self.columns[name]
+
+    def value(self, index: int) -> Any:
+        """interned value"""
+        if index not in self.texts:
+            offsets = self.column('values.offsets')
+            blob = self.header['columns']['values.blob'][0] + self.start
+            self.texts[index] = decode_value(
+                bytes(self.view[blob + offsets[index]:
+                                blob + offsets[index + 1]]).decode('utf-8'))
+        return self.texts[index]
+
+    def part_rows(self, part: str) -> range:
+        """resource rows defining part, found by binary search decoding
+        only the part numbers looked at"""
+        parts = self.column('resources.oempart')
+        low, high = 0, len(parts)
+        while low < high:
+            middle = (low + high) // 2
+            if self.value(parts[middle]) < part:
+                low = middle + 1
+            else:
+                high = middle
+        first, high = low, len(parts)
+        while low < high:
+            middle = (low + high) // 2
+            if part < self.value(parts[middle]):
+                high = middle
+            else:
+                low = middle + 1
+        return range(first, low)
+
+    def resource(self, row: int) -> Resource:
+        """resource of a row, built once so sources share it"""
+        if row not in self.built:
+            fields: list[Any] = [
+                (self.column(f'resources.{name}')[row] if code == 'd'
+                 else self.value(self.column(f'resources.{name}')[row]))
+                for name, code in RESOURCE_COLUMNS.items()
+                if name not in ('file', 'row', 'used')]
+            self.built[row] = Resource(*fields)
+        return self.built[row]
+
+    def source(self, row: int) -> ResourceSource:
+        """definition of a part in a row"""
+        return ResourceSource(
+            self.value(self.column('resources.file')[row]),
+            self.column('resources.row')[row],
+            self.resource(row))
+
+    def used_rows(self) -> Iterator[int]:
+        """rows of the definitions in use"""
+        used = self.column('resources.used')
+        return (row for row in range(len(used)) if used[row])
+
+    def close(self) -> None:
+        """release the mapping, nothing may be looked up after this"""
+        for column in self.columns.values():
+            column.release()
+        self.view.release()
+        if self.map:
+            self.map.close()
+        self.close_stream()
+
+    def close_stream(self) -> None:
+        """release the generation so writers may remove it"""
+        if self.stream:
+            unlock_file(self.stream)
+            self.stream.close()
+            self.stream = None
+
+
+class SnapshotResources(Mapping):
+    """resources in use by part number, looked up in the snapshot"""
+    def __init__(self, snapshot: Snapshot) -> None:
+        self.snapshot = snapshot
+
+    def __getitem__(self, part: str) -> Resource:
+        if not isinstance(part, str):
+            raise KeyError(part)
+        used = self.snapshot.column('resources.used')
+        for row in self.snapshot.part_rows(part):
+            if used[row]:
+                return self.snapshot.resource(row)
+        raise KeyError(part)
+
+    def __iter__(self) -> Iterator[str]:
+        parts = self.snapshot.column('resources.oempart')
+        return (self.snapshot.value(parts[row])
+                for row in self.snapshot.used_rows())
+
+    def __len__(self) -> int:
+        return sum(self.snapshot.column('resources.used'))
+
+
+class SnapshotSources(Mapping):
+    """every definition of each part, looked up in the snapshot"""
+    def __init__(self, snapshot: Snapshot) -> None:
+        self.snapshot = snapshot
+
+    def __getitem__(self, part: str) -> list[ResourceSource]:
+        rows = self.snapshot.part_rows(part) if isinstance(part, str) else ()
+        if not rows:
+            raise KeyError(part)
+        return [self.snapshot.source(row) for row in rows]
+
+    def __iter__(self) -> Iterator[str]:
+        parts = self.snapshot.column('resources.oempart')
+        previous = None
+        for index in parts:
+            if index != previous:
+                yield self.snapshot.value(index)
+            previous = index
+
+    def __len__(self) -> int:
+        return len(self.snapshot.resources)
+
+
+class SnapshotBoms(Mapping):
+    """BOMs by name, each built from the snapshot when first looked up"""
+    def __init__(self, snapshot: Snapshot) -> None:
+        self.snapshot = snapshot
+        self.headers: dict[str, list] = {
+            snapshot.value(header[0]): header
+            for header in snapshot.header['boms']}
+        self.built: dict[str, Bom] = {}
+
+    def __getitem__(self, name: str) -> Bom:
+        if name not in self.built:
+            self.built[name] = self.build(self.headers[name])
+        return self.built[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.headers)
+
+    def __len__(self) -> int:
+        return len(self.headers)
+
+    def build(self, header: list) -> Bom:
+        """BOM from its header entry and its run of part rows"""
+        value = self.snapshot.value
+        name, beam, smallest, biggest, start, stop, sizes, sections = header
+        bom = Bom(value(name), value(beam), smallest, biggest,
+                  {value(size): {value(hours): value(amount)
+                                 for hours, amount in labor}
+                   for size, labor in sizes},
+                  {value(section): BomSection(value(section), {})
+                   for section in sections})
+        columns = {column: self.snapshot.column(f'parts.{column}')
+                   for column in PART_COLUMNS}
+        for row in range(start, stop):
+            part = BomPart(value(columns['part'][row]),
+                           columns['qty'][row],
+                           columns['smallest'][row],
+                           columns['biggest'][row],
+                           columns['percent'][row])
+            bom.sections[value(columns['section'][row])].parts.setdefault(
+                part.part, []).append(part)
+        return bom
+
+
+def load_snapshot(snapshot_file: Union[Path, str]
+                  ) -> tuple[Boms, Consumables, HourlyRates, MarkUps,
+                             Models, Resources]:
+    """open snapshot, the same tuple as catalog.load_from_database but
+    boms and resources are looked up in the mapped file as they are used
+
+    Raises:
+        SnapshotError -- not a snapshot or written by another version
+
+    Returns:
+        tuple -- boms, consumables, hourly_rates, mark_ups, models, resources
+    """
+    file_message("Reading Snapshot from {file_name}", snapshot_file)
+    snapshot = Snapshot(snapshot_file)
+    value = snapshot.value
+    header = snapshot.header
+    models = Models({})
+    for sheet1, sheet2, folder in header['models']:
+        models.models[value(folder)] = Model(value(sheet1), value(sheet2),
+                                             value(folder))
+    return (Boms(snapshot.boms),  # type: ignore
+            Consumables({value(name): Consumable(rate)
+                         for name, rate in header['consumables']}),
+            HourlyRates({value(name): HourlyRate(rate)
+                         for name, rate in header['hourly_rates']}),
+            MarkUps({value(name): MarkUp(markup_1, markup_2, discount)
+                     for name, markup_1, markup_2, discount
+                     in header['mark_ups']}),
+            models,
+            Resources(snapshot.resources,  # type: ignore
+                      snapshot.sources))  # type: ignore
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# vim expandtab shiftwidth=4 softtabstop=4
+"""
+Copy source workbooks from the network share to a local staging folder
+
+openpyxl jumps around the zip central directory with many small reads,
+each one a round trip when BASE is a mapped network drive. Copying each
+workbook once with large sequential reads, several files at a time, and
+parsing the local copy keeps ingestion bound by bandwidth instead.
+
+Copies are kept under the same path relative to the folder all sources
+share (BASE), so folders with the same name in different places never
+share copies. Copies keep the modification time of the original so a
+workbook whose size and modification time are unchanged is not copied
+again. Files are copied to a temporary name first so an interrupted copy
+is never used.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from shutil import copy2
+from .resources import find_excel_files_in_dir
+from .utilities import status_msg
+
+# copies in flight at once, reads are I/O bound so threads are enough
+STAGING_THREADS = 8
+
+
+def source_base(folders: list[Path], files: list[Path]) -> Path:
+    """deepest folder holding all folders and files, staged paths are
+    relative to it so they do not change with what is staged"""
+    return Path(os.path.commonpath(
+        [folder.absolute() for folder in folders] +
+        [source.absolute().parent for source in files]))
+
+def staged_path(source: Path, base: Path, staging_dir: Path) -> Path:
+    """where source is kept in staging_dir, same path as below base
+
+    Arguments:
+        source: Path -- workbook or folder on the share
+        base: Path -- folder holding all sources, see source_base
+        staging_dir: Path -- local staging folder
+
+    Returns:
+        Path -- path of local copy
+    """
+    return staging_dir / source.absolute().relative_to(base)
+
+def is_unchanged(source: Path, target: Path) -> bool:
+    """does target already hold the current version of source"""
+    if not target.exists():
+        return False
+    original, copy = source.stat(), target.stat()
+    return (original.st_size == copy.st_size and
+            original.st_mtime_ns == copy.st_mtime_ns)
+
+def copy_workbook(source: Path, target: Path) -> bool:
+    """copy source to target unless it is unchanged
+
+    Returns:
+        bool -- True if the file was copied
+    """
+    if is_unchanged(source, target):
+        return False
+    partial = target.with_name(target.name + '.partial')
+    copy2(source, partial)
+    os.replace(partial, target)
+    status_msg(f"    staged {source.name}", 3)
+    return True
+
+def remove_stale(folder: Path, keep: set[Path]) -> None:
+    """drop workbooks removed from the share so they are not parsed"""
+    for local in find_excel_files_in_dir(folder):
+        if local not in keep:
+            local.unlink()
+
+def stage_workbooks(folders: list[Path],
+                    files: list[Path],
+                    staging_dir: Path,
+                    base: Path,
+                    threads: int = STAGING_THREADS) -> dict[Path, Path]:
+    """mirror workbooks of folders and single files into staging_dir
+
+    Arguments:
+        folders: list[Path] -- folders whose workbooks are all needed
+        files: list[Path] -- individual workbooks
+        staging_dir: Path -- local staging folder
+        base: Path -- folder holding all sources, see source_base
+        threads: int -- copies in flight at once
+
+    Returns:
+        dict[Path, Path] -- local copy of each folder and file
+    """
+    status_msg(f"Staging workbooks in {staging_dir}", 1)
+    copies: dict[Path, Path] = {}
+    for folder in folders:
+        for source in find_excel_files_in_dir(folder):
+            copies[staged_path(source, base, staging_dir)] = source
+    for source in files:
+        copies[staged_path(source, base, staging_dir)] = source
+    for target in copies:
+        target.parent.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        copied = sum(pool.map(copy_workbook, copies.values(), copies.keys()))
+    staged = {source: staged_path(source, base, staging_dir)
+              for source in folders + files}
+    for folder in folders:
+        staged[folder].mkdir(parents=True, exist_ok=True)
+        remove_stale(staged[folder], set(copies))
+    status_msg(f"  {copied} of {len(copies)} workbooks copied", 1)
+    return staged
+
+if __name__ == "__main__":
+    pass
@@ -5,8 +5,9 @@ Utility Functions
 """
 import os
 import sys
+from hashlib import sha1
 from pathlib import Path
-from typing import Union
+from typing import Any, Union
 import logging
 import logging.handlers
 from dotenv import load_dotenv  # pylint: disable=import-error
@@ -31,6 +32,9 @@ env_path = resource_path('.env')
 load_dotenv(dotenv_path=env_path)
 
 DATABASE: Path = Path(os.environ.get('DATABASE', ''))
+FILE_CACHE: Path = Path(os.environ.get('FILE_CACHE', ''))
+STAGING_FOLDER: Path = Path(os.environ.get('STAGING_FOLDER', ''))
+SNAPSHOT: Path = Path(os.environ.get('SNAPSHOT', ''))
 SHEETS_FOLDER: Path = Path(os.environ.get('SHEETS_FOLDER', ''))
 BOATS_FOLDER: Path = Path(os.environ.get('BOATS_FOLDER', ''))
 RESOURCES_FOLDER: Path = Path(os.environ.get('RESOURCES_FOLDER', ''))
@@ -50,6 +54,11 @@ SUMMARY: str = str(
 def noop() -> None:
     """Empty funtcion placeholder"""
 
+def entry_hash(entry: Any) -> str:
+    """fingerprint of everything an entry holds, dataclass repr shows all
+    fields and floats in full"""
+    return sha1(repr(entry).encode('utf-8')).hexdigest()
+
 
 class NRBError(Exception):
     """Base class for all NRB errors
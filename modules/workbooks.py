@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# vim expandtab shiftwidth=4 softtabstop=4
+"""
+Read cell values from the active sheet of an input workbook
+
+Readers:
+    openpyxl  -- full workbook load, builds every Cell object (default)
+    streaming -- openpyxl read-only mode, rows are parsed as they are
+                 iterated and only plain values are produced
+    native    -- zipfile + incremental XML parsing of the cached values
+                 (see xlsxnative), falls back to openpyxl if the workbook
+                 can not be read that way
+"""
+from contextlib import contextmanager
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Iterator, Optional, Union
+from openpyxl import load_workbook # pylint: disable=import-error
+from openpyxl.worksheet.worksheet import Worksheet
+from openpyxl.workbook.workbook import Workbook
+from .utilities import status_msg
+from .xlsxnative import NativeSheet, XlsxNativeError
+
+READERS: tuple[str, ...] = ('openpyxl', 'streaming', 'native')
+
+
+@contextmanager
+def open_sheet(xlsx_file: Path,
+               reader: str = 'openpyxl',
+               content: Optional[bytes] = None
+              ) -> Iterator[Union[Worksheet, NativeSheet]]:
+    """open workbook and provide its active sheet, workbook is closed on exit
+
+    Arguments:
+        xlsx_file: Path -- workbook to read
+        reader: str -- one of READERS
+        content: bytes -- contents of xlsx_file when already read
+
+    Returns:
+        Iterator[Worksheet] -- active sheet, use iter_rows(values_only=True)
+    """
+    if reader == 'native':
+        try:
+            native: Optional[NativeSheet] = NativeSheet(
+                xlsx_file if content is None else BytesIO(content))
+        except XlsxNativeError as error:
+            status_msg(f'    {xlsx_file.name} using openpyxl, {error}', 2)
+            native = None
+        if native:
+            with native:
+                yield native
+            return
+    xlsx: Workbook = load_workbook(xlsx_file.as_posix() if content is None
+                                   else BytesIO(content),
+                                   read_only=reader == 'streaming',
+                                   data_only=True)
+    try:
+        yield xlsx.active
+    finally:
+        xlsx.close()
+
+def sheet_values(xlsx_file: Path,
+                 reader: str = 'openpyxl',
+                 min_row: int = 1,
+                 max_col: Optional[int] = None,
+                 content: Optional[bytes] = None
+                ) -> Iterator[tuple[Any, ...]]:
+    """yield the values of each row in the active sheet
+
+    Arguments:
+        xlsx_file: Path -- workbook to read
+        reader: str -- one of READERS
+        min_row: int -- first row to return (1 based)
+        max_col: int -- rows are padded/truncated to this many columns
+        content: bytes -- contents of xlsx_file when already read
+
+    Returns:
+        Iterator[tuple] -- cached cell values, one tuple per row
+    """
+    with open_sheet(xlsx_file, reader, content) as sheet:
+        yield from sheet.iter_rows(min_row=min_row,
+                                   max_col=max_col,
+                                   values_only=True)
+
+if __name__ == "__main__":
+    pass
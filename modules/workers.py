@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# vim expandtab shiftwidth=4 softtabstop=4
+"""
+Spread independent spreadsheet files over a pool of worker processes
+
+Files are parsed in separate processes because openpyxl parsing is CPU
+bound and holds the GIL. Results always come back in the order of the files
+passed in so merging them is deterministic.
+
+With a Pipeline the files are read by a few threads ahead of the parsers
+and handed over as bytes, so reading the next files from disk/network
+overlaps with parsing the current ones. At most depth files are read ahead
+of the parsers, which bounds the memory held by the pipeline.
+"""
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TypeVar
+from .utilities import options
+
+T = TypeVar('T')
+
+
+@dataclass
+class Pipeline():
+    """read files on reader threads at most depth files ahead of parsing"""
+    readers: int = 2
+    depth: int = 4
+
+
+def worker_count(jobs: int) -> int:
+    """number of worker processes to use, 0 means one per cpu"""
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
+def init_worker(verbose: int) -> None:
+    """copy settings from parent process into a freshly started worker
+
+    Arguments:
+        verbose: int -- verbosity level of parent process
+
+    Returns:
+        None
+    """
+    options['verbose'] = verbose
+
+def read_ahead(files: list[Path],
+               pipeline: Pipeline) -> Iterator[tuple[Path, bytes]]:
+    """yield each file with its contents, in order, while reader threads
+    fetch the following files
+
+    Arguments:
+        files: list[Path] -- files to read
+        pipeline: Pipeline -- reader threads and files read ahead
+
+    Returns:
+        Iterator[tuple[Path, bytes]] -- file and its contents
+    """
+    remaining = iter(files)
+    queue: deque[tuple[Path, Future[bytes]]] = deque()
+    with ThreadPoolExecutor(max_workers=max(pipeline.readers, 1)) as pool:
+        for xlsx_file in islice(remaining, max(pipeline.depth, 1)):
+            queue.append((xlsx_file, pool.submit(xlsx_file.read_bytes)))
+        while queue:
+            xlsx_file, contents = queue.popleft()
+            for following in islice(remaining, 1):
+                queue.append((following, pool.submit(following.read_bytes)))
+            yield xlsx_file, contents.result()
+
+def pipeline_files(func: Callable[..., T],
+                   files: list[Path],
+                   workers: int,
+                   pipeline: Pipeline) -> list[T]:
+    """parse each file with func(file, content=bytes) as it is read
+
+    Parsing that has not started yet is limited to depth files past the
+    busy workers so reader threads can not run away from slow parsers.
+
+    Arguments:
+        func: Callable -- picklable function taking a content keyword
+        files: list[Path] -- files to parse
+        workers: int -- worker processes, 1 parses in this process
+        pipeline: Pipeline -- reader threads and files read ahead
+
+    Returns:
+        list -- results in the same order as files
+    """
+    if workers <= 1:
+        return [func(xlsx_file, content=content)
+                for xlsx_file, content in read_ahead(files, pipeline)]
+    results: list[T] = []
+    parsing: deque[Future[T]] = deque()
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=init_worker,
+                             initargs=(options['verbose'],)) as pool:
+        for xlsx_file, content in read_ahead(files, pipeline):
+            parsing.append(pool.submit(func, xlsx_file, content=content))
+            if len(parsing) > workers + pipeline.depth:
+                results.append(parsing.popleft().result())
+        results.extend(future.result() for future in parsing)
+    return results
+
+def map_files(func: Callable[..., T],
+              files: list[Path],
+              jobs: int = 1,
+              pipeline: Optional[Pipeline] = None) -> list[T]:
+    """parse each file with func
+
+    Arguments:
+        func: Callable -- picklable module level function or partial
+        files: list[Path] -- files to parse
+        jobs: int -- worker processes, 1 runs in this process, 0 per cpu
+        pipeline: Pipeline -- read files ahead on threads and pass their
+                              contents to func as content=bytes
+
+    Returns:
+        list -- results in the same order as files
+    """
+    workers = min(worker_count(jobs), len(files))
+    if pipeline:
+        return pipeline_files(func, files, workers, pipeline)
+    if workers <= 1:
+        return [func(file) for file in files]
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=init_worker,
+                             initargs=(options['verbose'],)) as pool:
+        return list(pool.map(func, files))
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# vim expandtab shiftwidth=4 softtabstop=4
+"""
+Native reader for cached cell values of the active sheet of a workbook
+
+Only what is needed to turn the sheet into plain values is read from the
+xlsx zip archive: workbook.xml (active sheet, 1904 dates), its relations,
+the shared strings, the number formats of the cell styles (to tell dates
+from numbers) and the sheet itself, which is parsed incrementally one row
+at a time. Values match openpyxl with data_only=True.
+
+Anything this reader does not understand raises XlsxNativeError when the
+workbook is opened so the caller can fall back to openpyxl.
+"""
+import posixpath
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional, Union
+from xml.etree.ElementTree import Element, iterparse, parse, ParseError
+from zipfile import BadZipFile, ZipFile
+from openpyxl.styles.numbers import (BUILTIN_FORMATS, is_date_format,
+                                     is_timedelta_format)
+from openpyxl.utils.datetime import (from_excel, from_ISO8601,
+                                     CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900)
+from .utilities import NRBError
+
+MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+RELATIONSHIP = ('{http://schemas.openxmlformats.org/officeDocument/2006/'
+                'relationships}id')
+PACKAGE = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+ROW, CELL = MAIN + 'row', MAIN + 'c'
+VALUE, INLINE, TEXT, RUN = MAIN + 'v', MAIN + 'is', MAIN + 't', MAIN + 'r'
+
+
+class XlsxNativeError(NRBError):
+    """Workbook can not be read by the native reader"""
+
+
+def column_index(reference: str) -> int:
+    """convert cell reference such as AB12 to column number (1 based)"""
+    column = 0
+    for char in reference:
+        if char.isdigit():
+            break
+        column = column * 26 + ord(char.upper()) - 64
+    return column
+
+def text_content(element: Element) -> str:
+    """text of a shared/inline string, plain text followed by rich runs"""
+    text = element.findtext(TEXT) or ''
+    for run in element.iterfind(RUN):
+        text += run.findtext(TEXT) or ''
+    return text
+
+
+class NativeSheet():
+    """
+    Active sheet of a workbook read without openpyxl, the archive is closed
+    on exit. Use as:
+
+        with NativeSheet(filename) as sheet:
+            for values in sheet.iter_rows(min_row=2, max_col=9):
+                ...
+
+    Raises:
+        XlsxNativeError -- workbook layout is not supported
+    """
+    def __init__(self, source: Union[Path, BinaryIO]) -> None:
+        try:
+            # stays open while rows are read, closed by close()/__exit__
+            self.archive: ZipFile = ZipFile(  # pylint: disable=R1732
+                source)
+        except (BadZipFile, OSError) as error:
+            raise XlsxNativeError(f"not an xlsx file: {error}") from error
+        try:
+            self.epoch = CALENDAR_WINDOWS_1900
+            self.sheet_path: str = ''
+            self.shared_strings: list[str] = []
+            self.date_formats: set[int] = set()
+            self.timedelta_formats: set[int] = set()
+            self.read_workbook()
+        except (KeyError, ValueError, ParseError) as error:
+            self.close()
+            raise XlsxNativeError(f"unsupported workbook: {error}") from error
+        except XlsxNativeError:
+            self.close()
+            raise
+
+    def __enter__(self) -> 'NativeSheet':
+        return self
+
+    def __exit__(self, exc_class, exc, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """release the zip archive"""
+        self.archive.close()
+
+    def read_workbook(self) -> None:
+        """locate the active sheet and load strings and date styles"""
+        with self.archive.open('xl/workbook.xml') as source:
+            workbook = parse(source).getroot()
+        properties = workbook.find(MAIN + 'workbookPr')
+        if (properties is not None and
+                properties.get('date1904', '') in ('1', 'true')):
+            self.epoch = CALENDAR_MAC_1904
+        active = 0
+        for view in workbook.iter(MAIN + 'workbookView'):
+            if view.get('activeTab') is not None:
+                active = int(view.get('activeTab', 0))
+                break
+        sheets = workbook.findall(f'{MAIN}sheets/{MAIN}sheet')
+        if not sheets:
+            raise XlsxNativeError("workbook has no sheets")
+        active_id = sheets[min(active, len(sheets) - 1)].get(RELATIONSHIP)
+
+        targets: dict[str, str] = {}
+        with self.archive.open('xl/_rels/workbook.xml.rels') as source:
+            for relation in parse(source).getroot().iter(
+                    PACKAGE + 'Relationship'):
+                target = relation.get('Target', '')
+                target = (target.lstrip('/') if target.startswith('/')
+                          else posixpath.normpath('xl/' + target))
+                targets[relation.get('Id', '')] = target
+                kind = relation.get('Type', '')
+                if kind.endswith('/sharedStrings'):
+                    self.read_shared_strings(target)
+                elif kind.endswith('/styles'):
+                    self.read_styles(target)
+                elif (relation.get('Id') == active_id and
+                      not kind.endswith('/worksheet')):
+                    raise XlsxNativeError("active sheet is not a worksheet")
+        self.sheet_path = targets[active_id or '']
+
+    def read_shared_strings(self, path: str) -> None:
+        """load the shared string table"""
+        with self.archive.open(path) as source:
+            for _, element in iterparse(source):
+                if element.tag == MAIN + 'si':
+                    self.shared_strings.append(
+                        text_content(element).replace('x005F_', ''))
+                    element.clear()
+
+    def read_styles(self, path: str) -> None:
+        """find the cell styles that hold dates or durations"""
+        with self.archive.open(path) as source:
+            styles = parse(source).getroot()
+        custom: dict[int, str] = {
+            int(number_format.get('numFmtId', 0)):
+            number_format.get('formatCode', '')
+            for number_format in styles.iter(MAIN + 'numFmt')}
+        cell_styles = styles.find(MAIN + 'cellXfs')
+        if cell_styles is None:
+            return
+        for index, style in enumerate(cell_styles.iterfind(MAIN + 'xf')):
+            number = int(style.get('numFmtId', 0))
+            code: Optional[str] = custom.get(number,
+                                             BUILTIN_FORMATS.get(number))
+            if code and is_date_format(code):
+                self.date_formats.add(index)
+            if code and is_timedelta_format(code):
+                self.timedelta_formats.add(index)
+
+    def cell_value(self, cell: Element) -> Any:
+        """cached value of cell converted the way openpyxl does"""
+        # pylint: disable=too-many-return-statements
+        kind = cell.get('t', 'n')
+        if kind == 'inlineStr':
+            inline = cell.find(INLINE)
+            return None if inline is None else text_content(inline)
+        value = cell.findtext(VALUE) or None
+        if value is None:
+            return None
+        if kind == 'n':
+            number = (float(value) if '.' in value or 'E' in value or
+                      'e' in value else int(value))
+            style = int(cell.get('s', 0))
+            if style not in self.date_formats:
+                return number
+            try:
+                return from_excel(number, self.epoch,
+                                  timedelta=style in self.timedelta_formats)
+            except (OverflowError, ValueError):
+                return '#VALUE!'
+        if kind == 's':
+            return self.shared_strings[int(value)]
+        if kind == 'b':
+            return bool(int(value))
+        if kind == 'd':
+            return from_ISO8601(value)
+        return value
+
+    def row_values(self,
+                   row: Element,
+                   max_col: Optional[int]) -> tuple[Any, ...]:
+        """values of the cells in a row element, padded with None"""
+        values: list[Any] = [None] * (max_col or 0)
+        column = 0
+        for cell in row.iterfind(CELL):
+            reference = cell.get('r')
+            column = column_index(reference) if reference else column + 1
+            if max_col is None:
+                values.extend([None] * (column - len(values)))
+            elif column > max_col:
+                break
+            values[column - 1] = self.cell_value(cell)
+        return tuple(values) or (None,)
+
+    def iter_rows(self,
+                  min_row: int = 1,
+                  max_row: Optional[int] = None,
+                  max_col: Optional[int] = None,
+                  values_only: bool = True) -> Iterator[tuple[Any, ...]]:
+        """yield values row by row like openpyxl Worksheet.iter_rows
+
+        Rows missing from the sheet are returned empty. Without max_col a row
+        is as wide as its last cell.
+        """
+        if not values_only:
+            raise XlsxNativeError("native reader only returns values")
+        empty: tuple[Any, ...] = (None,) * (max_col or 1)
+        next_row = min_row
+        number = 0
+        with self.archive.open(self.sheet_path) as source:
+            for _, element in iterparse(source):
+                if element.tag != ROW:
+                    continue
+                number = int(element.get('r', number + 1))
+                if max_row is not None and number > max_row:
+                    break
+                if number >= next_row:
+                    for _ in range(next_row, number):
+                        yield empty
+                    yield self.row_values(element, max_col)
+                    next_row = number + 1
+                element.clear()
+        if max_row is not None:
+            for _ in range(next_row, max_row + 1):
+                yield empty
+
+if __name__ == "__main__":
+    pass